@@ -2,13 +2,87 @@
 ArgoCD Agent
 Agent responsable du déploiement et de la configuration d'ArgoCD (GitOps)
 """
-import json
-import subprocess
+import base64
 import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+import yaml
 
 from core.agent_base import AgentInput, AgentOutput, BaseAgent
+from core.config import DeploymentMode
+from core.k8s_client import get_dynamic_client, server_side_apply
+
+# Version d'ArgoCD installée: un tag de release (immuable), pas une branche
+# comme "stable". Le manifest téléchargé est mis en cache par version: monter
+# de version = changer ce tag
+ARGOCD_VERSION = "v2.13.3"
+ARGOCD_MANIFEST_URL = (
+    "https://raw.githubusercontent.com/argoproj/argo-cd/{version}/manifests/install.yaml"
+)
+
+# Part minimale des objets de install.yaml à appliquer pour considérer
+# l'installation réussie
+ARGOCD_MIN_APPLIED_RATIO = 0.95
+
+# Patch (merge) du service argocd-server pour l'exposer en NodePort
+_ARGOCD_SVC_PATCH: Dict[str, Any] = {
+    "spec": {
+        "type": "NodePort",
+        "ports": [
+            {
+                "name": "http",
+                "port": 80,
+                "targetPort": 8080,
+                "nodePort": 30080,
+                "protocol": "TCP"
+            },
+            {
+                "name": "https",
+                "port": 443,
+                "targetPort": 8080,
+                "nodePort": 30443,
+                "protocol": "TCP"
+            }
+        ]
+    }
+}
+
+# Root Application du pattern App of Apps (identique pour tous les workflows,
+# sérialisée une seule fois à l'import)
+_ROOT_APP_MANIFEST: bytes = yaml.safe_dump(
+    {
+        "apiVersion": "argoproj.io/v1alpha1",
+        "kind": "Application",
+        "metadata": {
+            "name": "root",
+            "namespace": "argocd",
+            "finalizers": ["resources-finalizer.argocd.argoproj.io"]
+        },
+        "spec": {
+            "project": "default",
+            "source": {
+                "repoURL": "https://github.com/argoproj/argocd-example-apps.git",
+                "targetRevision": "HEAD",
+                "path": "apps"
+            },
+            "destination": {
+                "server": "https://kubernetes.default.svc",
+                "namespace": "argocd"
+            },
+            "syncPolicy": {
+                "automated": {
+                    "prune": True,
+                    "selfHeal": True
+                }
+            }
+        }
+    },
+    default_flow_style=False,
+    sort_keys=False,
+).encode()
 
 
 class ArgoCDAgent(BaseAgent):
@@ -23,6 +97,13 @@ class ArgoCDAgent(BaseAgent):
     - Gérer l'auto-gestion d'ArgoCD
     """
     
+    @staticmethod
+    def _core_v1(api_client: Any) -> Any:
+        """Retourne un CoreV1Api adossé au client partagé"""
+        from kubernetes import client
+        
+        return client.CoreV1Api(api_client)
+    
     def execute(self, agent_input: AgentInput) -> AgentOutput:
         """
         Déploie ArgoCD et configure le bootstrap
@@ -33,7 +114,6 @@ class ArgoCDAgent(BaseAgent):
         Returns:
             AgentOutput: Résultat du déploiement ArgoCD
         """
-        logs = []
         errors = []
         
         try:
@@ -51,15 +131,11 @@ class ArgoCDAgent(BaseAgent):
                     agent_name=self.agent_name,
                     success=False,
                     errors=errors,
-                    logs=logs,
+                    logs=self._captured_logs,
                 )
             
-            # Créer le répertoire de sortie pour ArgoCD
-            argocd_dir = Path("output") / agent_input.workflow_id / "argocd"
-            argocd_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Mode démo ou réel
-            if self.config.deployment_mode.value == "demo":
+            # Mode démo: rien n'est écrit sur disque
+            if self.config.deployment_mode is DeploymentMode.DEMO:
                 self.log("📺 Demo mode - Simulating ArgoCD deployment")
                 self.log_success("ArgoCD installed (simulated)")
                 self.log_success("App of Apps bootstrap created (simulated)")
@@ -71,16 +147,26 @@ class ArgoCDAgent(BaseAgent):
                         "argocd_installed": True,
                         "argocd_namespace": "argocd",
                         "argocd_url": "http://localhost:30080",
-                        "argocd_dir": str(argocd_dir),
+                        "argocd_dir": str(
+                            self.config.output_dir / agent_input.workflow_id / "argocd"
+                        ),
                         "bootstrap_app": "root",
                         "summary": "ArgoCD deployed in demo mode"
                     },
-                    logs=logs,
+                    logs=self._captured_logs,
                 )
             
-            # Mode réel: Installation ArgoCD
+            # Créer le répertoire de sortie pour ArgoCD
+            argocd_dir = self.ensure_dir(
+                self.workflow_output_dir(agent_input.workflow_id) / "argocd"
+            )
+            
+            # Mode réel: un seul client Kubernetes pour toutes les étapes
+            api_client = self._get_client(kubeconfig_path)
+            
+            # Installation ArgoCD
             self.log("Installing ArgoCD...")
-            argocd_installed = self._install_argocd(kubeconfig_path)
+            argocd_installed = self._install_argocd(api_client)
             
             if not argocd_installed:
                 error_msg = "Failed to install ArgoCD"
@@ -88,11 +174,10 @@ class ArgoCDAgent(BaseAgent):
                 self.log_error(error_msg)
             else:
                 self.log_success("ArgoCD installed successfully")
-                logs.append("ArgoCD installed")
             
             # Attendre qu'ArgoCD soit prêt
             self.log("Waiting for ArgoCD to be ready...")
-            argocd_ready = self._wait_for_argocd(kubeconfig_path)
+            argocd_ready = self._wait_for_argocd(api_client)
             
             if not argocd_ready:
                 error_msg = "ArgoCD not ready after timeout"
@@ -100,35 +185,35 @@ class ArgoCDAgent(BaseAgent):
                 self.log_error(error_msg)
             else:
                 self.log_success("ArgoCD is ready")
-                logs.append("ArgoCD ready")
             
-            # Exposer ArgoCD via NodePort
-            self.log("Exposing ArgoCD server...")
-            argocd_url = self._expose_argocd(kubeconfig_path)
+            # Exposition, mot de passe admin et bootstrap sont indépendants:
+            # on les lance en parallèle
+            self.log("Exposing ArgoCD server and creating App of Apps bootstrap...")
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                url_future = pool.submit(self._expose_argocd, api_client)
+                password_future = pool.submit(self._get_admin_password, api_client)
+                bootstrap_future = pool.submit(
+                    self._create_app_of_apps_bootstrap,
+                    kubeconfig_path,
+                    agent_input.workflow_id,
+                    argocd_dir
+                )
+                argocd_url = url_future.result()
+                admin_password = password_future.result()
+                bootstrap_created = bootstrap_future.result()
+            
             if argocd_url:
                 self.log_success(f"ArgoCD accessible at {argocd_url}")
-                logs.append(f"ArgoCD URL: {argocd_url}")
             
-            # Récupérer le mot de passe admin
-            admin_password = self._get_admin_password(kubeconfig_path)
             if admin_password:
                 self.log_success("ArgoCD admin password retrieved")
             
-            # Créer le App of Apps bootstrap
-            self.log("Creating App of Apps bootstrap...")
-            bootstrap_created = self._create_app_of_apps_bootstrap(
-                kubeconfig_path,
-                agent_input.workflow_id,
-                argocd_dir
-            )
-            
             if not bootstrap_created:
                 error_msg = "Failed to create App of Apps bootstrap"
                 errors.append(error_msg)
                 self.log_error(error_msg)
             else:
                 self.log_success("App of Apps bootstrap created")
-                logs.append("Bootstrap created")
             
             return AgentOutput(
                 agent_name=self.agent_name,
@@ -144,7 +229,7 @@ class ArgoCDAgent(BaseAgent):
                     "summary": f"ArgoCD deployed ({'success' if len(errors) == 0 else 'with errors'})"
                 },
                 errors=errors,
-                logs=logs,
+                logs=self._captured_logs,
             )
             
         except Exception as e:
@@ -156,115 +241,223 @@ class ArgoCDAgent(BaseAgent):
                 agent_name=self.agent_name,
                 success=False,
                 errors=errors,
-                logs=logs,
+                logs=self._captured_logs,
             )
     
-    def _install_argocd(self, kubeconfig_path: str) -> bool:
+    def _install_argocd(self, api_client: Any) -> bool:
         """
         Installe ArgoCD dans le cluster
         
+        Le manifest install.yaml est mis en cache localement puis chaque objet
+        est appliqué en server-side apply (SSA), en parallèle: les CRDs
+        d'abord, puis le reste. Les objets en échec sont réessayés une fois;
+        l'installation est considérée réussie si au moins
+        ARGOCD_MIN_APPLIED_RATIO des objets sont appliqués.
+        
         Returns:
             bool: True si succès
         """
         try:
-            import os
-            
-            env = os.environ.copy()
-            env["KUBECONFIG"] = kubeconfig_path
-            
-            # Créer le namespace argocd
-            subprocess.run(
-                ["kubectl", "create", "namespace", "argocd", "--dry-run=client", "-o", "yaml"],
-                capture_output=True,
-                env=env,
-                timeout=10
-            )
-            subprocess.run(
-                ["kubectl", "apply", "-f", "-"],
-                input=subprocess.run(
-                    ["kubectl", "create", "namespace", "argocd", "--dry-run=client", "-o", "yaml"],
-                    capture_output=True,
-                    text=True,
-                    env=env,
-                    timeout=10
-                ).stdout,
-                text=True,
-                capture_output=True,
-                env=env,
-                timeout=10
-            )
-            
-            # Installer ArgoCD (version stable)
-            # Utiliser --server-side pour contourner la limite des annotations CRD
-            # --force-conflicts pour résoudre les conflits avec d'anciennes installations
-            argocd_manifest_url = "https://raw.githubusercontent.com/argoproj/argo-cd/stable/manifests/install.yaml"
-            
-            result = subprocess.run(
-                ["kubectl", "apply", "-n", "argocd", "-f", argocd_manifest_url, "--server-side", "--force-conflicts"],
-                capture_output=True,
-                text=True,
-                env=env,
-                timeout=60
-            )
-            
-            if result.returncode != 0:
-                self.log_error(f"Failed to install ArgoCD: {result.stderr}")
-                return False
-            
-            return True
+            # Créer le namespace argocd (409 = déjà présent)
+            self._ensure_namespace(api_client, "argocd")
+            
+            manifests = [
+                doc for doc in yaml.safe_load_all(self._fetch_argocd_manifest()) if doc
+            ]
+            dyn_client = get_dynamic_client(api_client)
+            
+            # Résolution des ressources (discovery) avant de paralléliser
+            crds = []
+            others = []
+            for manifest in manifests:
+                resource = dyn_client.resources.get(
+                    api_version=manifest["apiVersion"], kind=manifest["kind"]
+                )
+                batch = crds if manifest["kind"] == "CustomResourceDefinition" else others
+                batch.append((resource, manifest))
+            
+            failed = []
+            for batch in (crds, others):
+                with ThreadPoolExecutor(max_workers=8) as pool:
+                    results = pool.map(lambda item: self._server_side_apply(*item), batch)
+                    failed.extend(item for item, error in zip(batch, results) if error)
+            
+            # Second essai, séquentiel, des objets en échec (conflits transitoires,
+            # dépendances d'ordre): seuls les échecs persistants sont loggés
+            errors = [
+                error for error in (self._server_side_apply(*item) for item in failed) if error
+            ]
+            for error in errors:
+                self.log_error(f"Failed to install ArgoCD: {error}")
+            
+            if errors:
+                self.log_warning(f"{len(errors)}/{len(manifests)} ArgoCD objects not applied")
+            
+            # Une installation partielle (restes d'une ancienne installation)
+            # reste exploitable si l'essentiel des objets est appliqué
+            return len(errors) <= len(manifests) * (1 - ARGOCD_MIN_APPLIED_RATIO)
             
         except Exception as e:
             self.log_error(f"ArgoCD installation error: {e}")
             return False
     
-    def _wait_for_argocd(self, kubeconfig_path: str, max_attempts: int = 30, delay: int = 10) -> bool:
+    def _fetch_argocd_manifest(self) -> bytes:
+        """
+        Retourne le manifest d'installation ArgoCD, téléchargé au premier appel
+        
+        Le cache est indexé par ARGOCD_VERSION (tag immuable): il n'expire pas.
+        
+        Returns:
+            bytes: Contenu de install.yaml
+        """
+        cache_file = self.config.data_dir / "cache" / f"argocd-install-{ARGOCD_VERSION}.yaml"
+        if cache_file.exists():
+            return cache_file.read_bytes()
+        
+        url = ARGOCD_MANIFEST_URL.format(version=ARGOCD_VERSION)
+        with urllib.request.urlopen(url, timeout=60) as response:
+            content = response.read()
+        
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(".tmp")
+        tmp_file.write_bytes(content)
+        tmp_file.replace(cache_file)
+        return content
+    
+    @staticmethod
+    def _server_side_apply(resource: Any, manifest: Dict[str, Any]) -> Optional[str]:
+        """
+        Applique un objet dans le namespace argocd en server-side apply
+        
+        Appel du DynamicClient avec le field manager "kube-agent" et
+        force_conflicts=True: les champs gérés par un autre field manager
+        (anciennes installations) sont repris.
+        
+        Args:
+            resource: Ressource résolue par le DynamicClient
+            manifest: Objet à appliquer
+            
+        Returns:
+            Optional[str]: Message d'erreur, None si succès
+        """
+        return server_side_apply(resource, manifest, namespace="argocd")
+    
+    def _ensure_namespace(self, api_client: Any, name: str) -> None:
+        """
+        Crée un namespace s'il n'existe pas encore
+        
+        Args:
+            api_client: Client Kubernetes partagé
+            name: Nom du namespace
+        """
+        from kubernetes import client
+        from kubernetes.client.rest import ApiException
+        
+        try:
+            self._core_v1(api_client).create_namespace(
+                body=client.V1Namespace(metadata=client.V1ObjectMeta(name=name))
+            )
+        except ApiException as e:
+            if e.status != 409:
+                raise
+    
+    def _wait_for_argocd(self, api_client: Any, timeout: int = 300) -> bool:
         """
         Attend qu'ArgoCD soit prêt
         
+        Utilise l'API Watch de Kubernetes plutôt qu'un polling: un LIST initial
+        donne l'état courant et la resourceVersion, puis on suit les événements
+        des pods jusqu'à ce qu'ils soient tous prêts. En cas de 410 Gone, on
+        relance un LIST pour repartir d'une resourceVersion récente.
+        
+        Args:
+            api_client: Client Kubernetes partagé
+            timeout: Délai maximum d'attente en secondes
+        
         Returns:
             bool: True si ArgoCD est prêt
         """
         try:
-            import os
-            
-            env = os.environ.copy()
-            env["KUBECONFIG"] = kubeconfig_path
-            
-            for attempt in range(max_attempts):
-                result = subprocess.run(
-                    ["kubectl", "get", "pods", "-n", "argocd", "-o", "json"],
-                    capture_output=True,
-                    text=True,
-                    env=env,
-                    timeout=10
-                )
-                
-                if result.returncode == 0:
-                    pods_data = json.loads(result.stdout)
-                    total_pods = len(pods_data.get("items", []))
-                    ready_pods = 0
-                    
-                    for pod in pods_data.get("items", []):
-                        phase = pod["status"].get("phase", "Unknown")
-                        if phase in ["Running", "Succeeded"]:
-                            ready_pods += 1
-                    
-                    if ready_pods == total_pods and total_pods > 0:
-                        self.log(f"✅ ArgoCD ready: {ready_pods}/{total_pods} pods")
+            from kubernetes import watch
+            from kubernetes.client.rest import ApiException
+            
+            v1 = self._core_v1(api_client)
+            
+            deadline = time.monotonic() + timeout
+            pods_ready: Dict[str, bool] = {}
+            resource_version = None
+            
+            while time.monotonic() < deadline:
+                if resource_version is None:
+                    pod_list = v1.list_namespaced_pod(namespace="argocd")
+                    pods_ready = {
+                        pod.metadata.name: self._is_pod_ready(pod) for pod in pod_list.items
+                    }
+                    resource_version = pod_list.metadata.resource_version
+                    if self._all_pods_ready(pods_ready):
                         return True
-                    else:
-                        self.log(f"⏳ ArgoCD starting: {ready_pods}/{total_pods} pods ready (attempt {attempt+1}/{max_attempts})")
                 
-                if attempt < max_attempts - 1:
-                    time.sleep(delay)
-            
+                w = watch.Watch()
+                try:
+                    for event in w.stream(
+                        v1.list_namespaced_pod,
+                        namespace="argocd",
+                        resource_version=resource_version,
+                        timeout_seconds=max(1, int(deadline - time.monotonic())),
+                    ):
+                        if event["type"] not in ("ADDED", "MODIFIED", "DELETED"):
+                            continue
+                        
+                        pod = event["object"]
+                        resource_version = pod.metadata.resource_version
+                        if event["type"] == "DELETED":
+                            pods_ready.pop(pod.metadata.name, None)
+                        else:
+                            pods_ready[pod.metadata.name] = self._is_pod_ready(pod)
+                        
+                        if self._all_pods_ready(pods_ready):
+                            w.stop()
+                            return True
+                except ApiException as e:
+                    if e.status != 410:
+                        raise
+                    # resourceVersion expirée: repartir d'un LIST frais
+                    resource_version = None
+            
+            ready_pods = sum(pods_ready.values())
+            self.log(f"⏳ ArgoCD not ready: {ready_pods}/{len(pods_ready)} pods ready")
             return False
             
         except Exception as e:
             self.log_error(f"Failed to check ArgoCD status: {e}")
             return False
     
-    def _expose_argocd(self, kubeconfig_path: str) -> str:
+    @staticmethod
+    def _is_pod_ready(pod: Any) -> bool:
+        """
+        Indique si un pod est prêt
+        
+        phase=Running ne garantit pas que les readiness probes passent: on
+        regarde la condition Ready. Les pods terminés (Succeeded) comptent
+        comme prêts.
+        """
+        if pod.status.phase == "Succeeded":
+            return True
+        return any(
+            condition.type == "Ready" and condition.status == "True"
+            for condition in pod.status.conditions or []
+        )
+    
+    def _all_pods_ready(self, pods_ready: Dict[str, bool]) -> bool:
+        """Vérifie que tous les pods suivis sont prêts (et qu'il y en a au moins un)"""
+        ready_pods = sum(pods_ready.values())
+        total_pods = len(pods_ready)
+        if total_pods > 0 and ready_pods == total_pods:
+            self.log(f"✅ ArgoCD ready: {ready_pods}/{total_pods} pods")
+            return True
+        return False
+    
+    def _expose_argocd(self, api_client: Any) -> str:
         """
         Expose ArgoCD server via NodePort
         
@@ -272,46 +465,15 @@ class ArgoCDAgent(BaseAgent):
             str: URL d'accès ArgoCD
         """
         try:
-            import os
+            from kubernetes.client.rest import ApiException
             
-            env = os.environ.copy()
-            env["KUBECONFIG"] = kubeconfig_path
+            v1 = self._core_v1(api_client)
             
             # Patch le service argocd-server en NodePort
-            patch = {
-                "spec": {
-                    "type": "NodePort",
-                    "ports": [
-                        {
-                            "name": "http",
-                            "port": 80,
-                            "targetPort": 8080,
-                            "nodePort": 30080,
-                            "protocol": "TCP"
-                        },
-                        {
-                            "name": "https",
-                            "port": 443,
-                            "targetPort": 8080,
-                            "nodePort": 30443,
-                            "protocol": "TCP"
-                        }
-                    ]
-                }
-            }
-            
-            result = subprocess.run(
-                ["kubectl", "patch", "svc", "argocd-server", "-n", "argocd", 
-                 "--type", "merge", "-p", json.dumps(patch)],
-                capture_output=True,
-                text=True,
-                env=env,
-                timeout=10
-            )
-            
-            if result.returncode != 0:
-                self.log_warning(f"Failed to patch ArgoCD service: {result.stderr}")
-                return "http://localhost:30080"
+            try:
+                v1.patch_namespaced_service("argocd-server", "argocd", _ARGOCD_SVC_PATCH)
+            except ApiException as e:
+                self.log_warning(f"Failed to patch ArgoCD service: {e.reason}")
             
             return "http://localhost:30080"
             
@@ -319,35 +481,43 @@ class ArgoCDAgent(BaseAgent):
             self.log_error(f"Failed to expose ArgoCD: {e}")
             return "http://localhost:30080"
     
-    def _get_admin_password(self, kubeconfig_path: str) -> str:
+    def _get_admin_password(self, api_client: Any, timeout: int = 60) -> str:
         """
         Récupère le mot de passe admin ArgoCD
         
+        Le secret argocd-initial-admin-secret peut être créé quelques secondes
+        après que les pods soient prêts: on le surveille (watch) plutôt que de
+        le lire une seule fois.
+        
+        Args:
+            api_client: Client Kubernetes partagé
+            timeout: Délai maximum d'attente du secret en secondes
+        
         Returns:
             str: Mot de passe admin
         """
         try:
-            import os
-            
-            env = os.environ.copy()
-            env["KUBECONFIG"] = kubeconfig_path
-            
-            # Le password est dans le secret argocd-initial-admin-secret
-            result = subprocess.run(
-                ["kubectl", "get", "secret", "argocd-initial-admin-secret", 
-                 "-n", "argocd", "-o", "jsonpath={.data.password}"],
-                capture_output=True,
-                text=True,
-                env=env,
-                timeout=10
-            )
-            
-            if result.returncode == 0 and result.stdout:
-                # Décoder le base64
-                import base64
-                password = base64.b64decode(result.stdout).decode('utf-8')
-                return password
+            from kubernetes import watch
+            
+            v1 = self._core_v1(api_client)
+            
+            w = watch.Watch()
+            for event in w.stream(
+                v1.list_namespaced_secret,
+                namespace="argocd",
+                field_selector="metadata.name=argocd-initial-admin-secret",
+                timeout_seconds=timeout,
+            ):
+                if event["type"] not in ("ADDED", "MODIFIED"):
+                    continue
+                
+                encoded = (event["object"].data or {}).get("password")
+                if encoded:
+                    w.stop()
+                    # Décoder le base64
+                    return base64.b64decode(encoded).decode('utf-8')
             
+            self.log_warning("ArgoCD initial admin secret not found, using default password")
             return "admin"
             
         except Exception as e:
@@ -372,45 +542,10 @@ class ArgoCDAgent(BaseAgent):
             bool: True si succès
         """
         try:
-            import os
-            
-            env = os.environ.copy()
-            env["KUBECONFIG"] = kubeconfig_path
-            
-            # Créer le ConfigMap pour le root app
-            root_app_manifest = {
-                "apiVersion": "argoproj.io/v1alpha1",
-                "kind": "Application",
-                "metadata": {
-                    "name": "root",
-                    "namespace": "argocd",
-                    "finalizers": ["resources-finalizer.argocd.argoproj.io"]
-                },
-                "spec": {
-                    "project": "default",
-                    "source": {
-                        "repoURL": "https://github.com/argoproj/argocd-example-apps.git",
-                        "targetRevision": "HEAD",
-                        "path": "apps"
-                    },
-                    "destination": {
-                        "server": "https://kubernetes.default.svc",
-                        "namespace": "argocd"
-                    },
-                    "syncPolicy": {
-                        "automated": {
-                            "prune": True,
-                            "selfHeal": True
-                        }
-                    }
-                }
-            }
-            
             # Pour l'instant, on crée juste un placeholder
             # Les autres agents vont ajouter leurs Applications
             root_app_file = argocd_dir / "root-app.yaml"
-            with open(root_app_file, 'w') as f:
-                json.dump(root_app_manifest, f, indent=2)
+            root_app_file.write_bytes(_ROOT_APP_MANIFEST)
             
             self.log("App of Apps structure created")
             return True
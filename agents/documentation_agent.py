@@ -3,11 +3,230 @@ Documentation Agent
 Agent responsable de la génération automatique de la documentation
 """
 import json
+import os
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from string import Template
+from typing import Any, Dict, List, Tuple, Union
+
+from jinja2 import Environment, FileSystemLoader
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel: repli sur json
+    orjson = None
 
 from core.agent_base import AgentInput, AgentOutput, BaseAgent
+from core.fileutils import data_fingerprint, write_bytes
+
+# Templates Markdown de la documentation (agents/templates/*.md.j2).
+# auto_reload=False + cache illimité: chaque template est compilé une seule
+# fois par process, les rendus suivants ne font que la substitution.
+_JINJA_ENV = Environment(
+    loader=FileSystemLoader(Path(__file__).parent / "templates"),
+    auto_reload=False,
+    cache_size=-1,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    keep_trailing_newline=True,
+)
+
+# Diagramme ASCII de l'architecture: gabarit fixe compilé à l'import,
+# seuls la plateforme, la rétention et les CIDRs varient
+_ARCHITECTURE_DIAGRAM = Template("""
+╔════════════════════════════════════════════════════════════════╗
+║              ARCHITECTURE - $platform CLUSTER                      ║
+╚════════════════════════════════════════════════════════════════╝
+
+┌──────────────────────────────────────────────────────────────┐
+│                      CONTROL PLANE                            │
+│  ┌──────────────┐  ┌──────────────┐  ┌──────────────┐      │
+│  │  API Server  │  │  Scheduler   │  │   etcd       │      │
+│  └──────────────┘  └──────────────┘  └──────────────┘      │
+└──────────────────────────────────────────────────────────────┘
+$worker_nodes
+
+┌──────────────────────────────────────────────────────────────┐
+│                    MONITORING STACK                           │
+│  ┌──────────────────────┐    ┌─────────────────────────┐    │
+│  │     PROMETHEUS       │◄───│       GRAFANA           │    │
+│  │  (Metrics Storage)   │    │   (Visualization)       │    │
+│  │                      │    │                         │    │
+│  │  • Scrape Interval   │    │  • Dashboards           │    │
+│  │  • Alert Rules       │    │  • User Auth            │    │
+│  │  • Retention: $retention │    │  • Datasources          │    │
+│  └──────────────────────┘    └─────────────────────────┘    │
+│           ▲                            │                      │
+│           │ scrapes                    │ queries              │
+│           │                            ▼                      │
+│  ┌────────┴────────┐         ┌──────────────────┐           │
+│  │  ServiceMonitor │         │     Users        │           │
+│  │   kube-state    │         └──────────────────┘           │
+│  │   node-exporter │                                         │
+│  └─────────────────┘                                         │
+└──────────────────────────────────────────────────────────────┘
+
+┌──────────────────────────────────────────────────────────────┐
+│                      NETWORKING                               │
+│  Pod CIDR:     $pod_cidr                       │
+│  Service CIDR: $service_cidr                       │
+└──────────────────────────────────────────────────────────────┘
+
+Legend:
+  ▲ = Data flow up
+  ▼ = Data flow down
+  ◄─ = Connection
+  └─ = Hierarchy
+""")
+
+
+# Fichiers produits dans le répertoire de documentation d'un workflow
+DOCS_FILES = (
+    "README.md",
+    "ARCHITECTURE.md",
+    "RUNBOOK.md",
+    "TROUBLESHOOTING.md",
+    "configs",
+    "ARCHITECTURE_DIAGRAM.txt",
+)
+
+# Empreinte des entrées de la dernière génération
+DOCS_HASH_FILE = ".docs_hash"
+
+# Section "Haute Disponibilité" d'ARCHITECTURE.md selon l'environnement
+_HA_PROD = """
+- Multi-nodes pour la redondance
+- Prometheus avec retention longue
+- Sauvegardes automatiques configurées
+"""
+_HA_DEV = """
+- Configuration simple-node (non-production)
+- Retention courte pour économiser les ressources
+"""
+
+
+# Nombre maximum de nœuds workers dessinés dans le diagramme ASCII
+DIAGRAM_MAX_NODES = 5
+
+# Position du tronc sous le control plane et largeur d'une colonne worker
+_DIAGRAM_TRUNK = 28
+_DIAGRAM_COLUMN_WIDTH = 20
+
+# Colonne d'un nœud worker (18 caractères, "{name}" centré)
+_WORKER_NODE_COLUMN = (
+    "┌───────▼────────┐",
+    "│  WORKER NODE   │",
+    "│{name}│",
+    "│                │",
+    "│  ┌───────────┐ │",
+    "│  │  Kubelet  │ │",
+    "│  └───────────┘ │",
+    "│  ┌───────────┐ │",
+    "│  │Application│ │",
+    "│  │   Pods    │ │",
+    "│  └───────────┘ │",
+    "└────────────────┘",
+)
+
+
+def _render_worker_nodes(nodes: int) -> str:
+    """
+    Dessine les colonnes des nœuds workers et leur raccordement au control plane
+    
+    Args:
+        nodes: Nombre de nœuds workers (au-delà de DIAGRAM_MAX_NODES, seules
+            les premières colonnes sont dessinées)
+        
+    Returns:
+        str: Partie "workers" du diagramme
+    """
+    columns = min(nodes, DIAGRAM_MAX_NODES)
+    centers = [i * _DIAGRAM_COLUMN_WIDTH + 8 for i in range(columns)]
+    left = min(centers[0], _DIAGRAM_TRUNK)
+    right = max(centers[-1], _DIAGRAM_TRUNK)
+    
+    # Ligne de raccordement: tronc (haut) et colonnes (bas)
+    junctions = {
+        (True, True): ("├", "┼", "┤"),
+        (True, False): ("└", "┴", "┘"),
+        (False, True): ("┌", "┬", "┐"),
+    }
+    fan_out = []
+    for position in range(left, right + 1):
+        up = position == _DIAGRAM_TRUNK
+        down = position in centers
+        if not (up or down):
+            fan_out.append("─")
+            continue
+        first, middle, last = junctions[(up, down)]
+        if position == left:
+            fan_out.append(first)
+        elif position == right:
+            fan_out.append(last)
+        else:
+            fan_out.append(middle)
+    
+    lines = [
+        " " * _DIAGRAM_TRUNK + "│",
+        " " * left + "".join(fan_out),
+        "".join(
+            " " * (center - previous - 1) + "│"
+            for previous, center in zip([-1] + centers, centers)
+        ),
+    ]
+    for row in _WORKER_NODE_COLUMN:
+        lines.append("  ".join(
+            row.format(name=f"(node-{i + 1})".center(16)) for i in range(columns)
+        ))
+    if nodes > columns:
+        lines.append(f"  ... + {nodes - columns} worker node(s)")
+    
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=8)
+def _architecture_diagram_for(nodes: int) -> Template:
+    """
+    Spécialise le diagramme ASCII pour un nombre de nœuds donné (mis en cache)
+    
+    Args:
+        nodes: Nombre de nœuds workers
+        
+    Returns:
+        Template: Diagramme restant à compléter (plateforme, rétention, CIDR)
+    """
+    return Template(_ARCHITECTURE_DIAGRAM.safe_substitute(
+        worker_nodes=_render_worker_nodes(nodes)
+    ))
+
+
+def _dump_json(data: Any) -> bytes:
+    """Sérialise en JSON indenté (orjson si disponible, sinon json)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+@lru_cache(maxsize=32)
+def _render_troubleshooting(platform: str, prometheus_url: str) -> str:
+    """
+    Rend le guide de troubleshooting (mis en cache)
+    
+    Le guide ne dépend que de la plateforme et de l'URL Prometheus: les
+    workflows qui partagent ces valeurs réutilisent le même rendu.
+    
+    Args:
+        platform: Plateforme Kubernetes
+        prometheus_url: URL de Prometheus
+        
+    Returns:
+        str: Contenu de TROUBLESHOOTING.md
+    """
+    return _JINJA_ENV.get_template("troubleshooting.md.j2").render(
+        platform=platform,
+        prometheus_url=prometheus_url,
+    )
 
 
 class DocumentationAgent(BaseAgent):
@@ -35,284 +254,254 @@ class DocumentationAgent(BaseAgent):
         logs = []
         errors = []
         
+        self.log("Generating documentation")
+        
+        # Récupérer tous les outputs
+        planner_output = agent_input.previous_outputs.get("planner", {})
+        infra_output = agent_input.previous_outputs.get("infrastructure", {})
+        monitoring_output = agent_input.previous_outputs.get("monitoring", {})
+        validation_output = agent_input.previous_outputs.get("validation", {})
+        
+        config = planner_output.get("optimized_config", agent_input.context)
+        platform = config.get("platform", "k3s")
+        
+        # Un seul horodatage pour tous les documents du workflow
+        generated_at = datetime.now()
+        
+        # Mêmes entrées que la génération précédente: les documents
+        # existants sont conservés tels quels
+        fingerprint = data_fingerprint({
+            "config": config,
+            "planner": planner_output,
+            "infrastructure": infra_output,
+            "monitoring": monitoring_output,
+            "validation": validation_output,
+        })
+        
+        # Créer les répertoires de documentation (docs/ et docs/configs/)
         try:
-            self.log("Generating documentation")
-            
-            # Récupérer tous les outputs
-            planner_output = agent_input.previous_outputs.get("planner", {})
-            infra_output = agent_input.previous_outputs.get("infrastructure", {})
-            monitoring_output = agent_input.previous_outputs.get("monitoring", {})
-            validation_output = agent_input.previous_outputs.get("validation", {})
-            
-            config = planner_output.get("optimized_config", agent_input.context)
-            platform = config.get("platform", "k3s")
-            environment = config.get("environment", "development")
-            
-            # Créer le répertoire de documentation
             docs_dir = self._prepare_docs_directory(agent_input.workflow_id)
-            logs.append(f"Documentation directory: {docs_dir}")
-            
-            # Générer README principal
-            self.log("Generating README...")
-            readme_path = self._generate_readme(
-                docs_dir,
-                agent_input.workflow_id,
-                config,
-                planner_output,
-                infra_output,
-                monitoring_output,
-                validation_output
-            )
-            logs.append(f"README generated: {readme_path}")
-            self.log_success("README.md generated")
-            
-            # Générer le document d'architecture
-            self.log("Generating architecture documentation...")
-            arch_path = self._generate_architecture_doc(
-                docs_dir,
-                config,
-                infra_output,
-                monitoring_output
-            )
-            logs.append(f"Architecture doc: {arch_path}")
-            self.log_success("ARCHITECTURE.md generated")
-            
-            # Générer le runbook opérationnel
-            self.log("Generating operational runbook...")
-            runbook_path = self._generate_runbook(
-                docs_dir,
-                config,
-                infra_output,
-                monitoring_output
-            )
-            logs.append(f"Runbook: {runbook_path}")
-            self.log_success("RUNBOOK.md generated")
-            
-            # Générer le guide de troubleshooting
-            self.log("Generating troubleshooting guide...")
-            troubleshooting_path = self._generate_troubleshooting(
-                docs_dir,
-                platform,
-                monitoring_output
-            )
-            logs.append(f"Troubleshooting: {troubleshooting_path}")
-            self.log_success("TROUBLESHOOTING.md generated")
-            
-            # Générer les configurations exportées
-            self.log("Exporting configurations...")
-            config_path = self._export_configurations(
-                docs_dir,
-                agent_input.workflow_id,
-                config,
-                infra_output
-            )
-            logs.append(f"Configurations exported: {config_path}")
-            self.log_success("Configurations exported")
-            
-            # Générer un diagramme d'architecture ASCII
-            self.log("Generating architecture diagram...")
-            diagram = self._generate_architecture_diagram(config, monitoring_output)
-            diagram_path = docs_dir / "ARCHITECTURE_DIAGRAM.txt"
-            diagram_path.write_text(diagram)
-            logs.append(f"Diagram: {diagram_path}")
-            self.log_success("Architecture diagram generated")
-            
-            # Liste de tous les fichiers générés
-            generated_files = list(docs_dir.glob("*"))
-            
-            return AgentOutput(
-                agent_name=self.agent_name,
-                success=True,
-                data={
-                    "docs_directory": str(docs_dir),
-                    "readme_path": str(readme_path),
-                    "architecture_path": str(arch_path),
-                    "runbook_path": str(runbook_path),
-                    "troubleshooting_path": str(troubleshooting_path),
-                    "config_path": str(config_path),
-                    "generated_files": [str(f) for f in generated_files],
-                    "summary": f"Documentation generated in {docs_dir.name}"
-                },
-                errors=errors,
-                logs=logs,
-            )
-            
-        except Exception as e:
-            error_msg = f"Documentation generation failed: {str(e)}"
-            errors.append(error_msg)
-            self.log_error(error_msg)
-            
-            return AgentOutput(
-                agent_name=self.agent_name,
-                success=False,
-                errors=errors,
-                logs=logs,
-            )
+        except OSError as e:
+            return self._docs_failure(e, errors, logs)
+        logs.append(f"Documentation directory: {docs_dir}")
+        
+        if self._docs_up_to_date(docs_dir, fingerprint):
+            logs.append("Documentation inputs unchanged, generation skipped")
+            self.log_success("Documentation up to date")
+            return self._docs_output(docs_dir, errors, logs)
+        
+        # Les générateurs retournent (chemin, contenu): tout est écrit en
+        # une seule passe à la fin
+        pending_writes: List[Tuple[Path, Union[str, bytes]]] = []
+        config_path = docs_dir / "configs"
+        diagram_path = docs_dir / "ARCHITECTURE_DIAGRAM.txt"
+        
+        # Générer README principal
+        readme_path, readme = self._generate_readme(
+            docs_dir,
+            agent_input.workflow_id,
+            generated_at,
+            config,
+            planner_output,
+            infra_output,
+            monitoring_output,
+            validation_output
+        )
+        pending_writes.append((readme_path, readme))
+        logs.append(f"README generated: {readme_path}")
+        
+        # Générer le document d'architecture
+        arch_path, architecture = self._generate_architecture_doc(
+            docs_dir,
+            config,
+            infra_output,
+            monitoring_output
+        )
+        pending_writes.append((arch_path, architecture))
+        logs.append(f"Architecture doc: {arch_path}")
+        
+        # Générer le runbook opérationnel
+        runbook_path, runbook = self._generate_runbook(
+            docs_dir,
+            config,
+            infra_output,
+            monitoring_output
+        )
+        pending_writes.append((runbook_path, runbook))
+        logs.append(f"Runbook: {runbook_path}")
+        
+        # Générer le guide de troubleshooting
+        troubleshooting_path, troubleshooting = self._generate_troubleshooting(
+            docs_dir,
+            platform,
+            monitoring_output
+        )
+        pending_writes.append((troubleshooting_path, troubleshooting))
+        logs.append(f"Troubleshooting: {troubleshooting_path}")
+        
+        # Générer les configurations exportées
+        pending_writes.extend(self._export_configurations(
+            config_path,
+            agent_input.workflow_id,
+            generated_at,
+            config,
+            infra_output
+        ))
+        logs.append(f"Configurations exported: {config_path}")
+        
+        # Générer un diagramme d'architecture ASCII
+        pending_writes.append((
+            diagram_path,
+            self._generate_architecture_diagram(config, monitoring_output)
+        ))
+        logs.append(f"Diagram: {diagram_path}")
+        
+        # Écrire tous les fichiers générés, puis l'empreinte des entrées
+        pending_writes.append((docs_dir / DOCS_HASH_FILE, fingerprint))
+        try:
+            self._write_files(pending_writes)
+        except (OSError, UnicodeEncodeError) as e:
+            return self._docs_failure(e, errors, logs)
+        
+        # Un seul message console pour toute la génération: le détail
+        # par fichier reste dans logs
+        self.log_success(f"Documentation generated in {docs_dir}")
+        
+        return self._docs_output(docs_dir, errors, logs)
+    
+    def _docs_failure(self, error: Exception, errors: List[str], logs: List[str]) -> AgentOutput:
+        """Construit le résultat d'échec de l'agent"""
+        error_msg = f"Documentation generation failed: {str(error)}"
+        errors.append(error_msg)
+        self.log_error(error_msg)
+        
+        return AgentOutput(
+            agent_name=self.agent_name,
+            success=False,
+            errors=errors,
+            logs=logs,
+        )
     
     def _prepare_docs_directory(self, workflow_id: str) -> Path:
-        """Prépare le répertoire de documentation"""
+        """Prépare le répertoire de documentation et son sous-répertoire configs/"""
         docs_dir = self.config.output_dir / "docs" / workflow_id
-        docs_dir.mkdir(parents=True, exist_ok=True)
+        self.ensure_dir(docs_dir / "configs")
         return docs_dir
     
+    @staticmethod
+    def _docs_files(docs_dir: Path) -> List[Path]:
+        """Liste les fichiers produits par la génération de documentation"""
+        return [docs_dir / name for name in DOCS_FILES]
+    
+    def _docs_up_to_date(self, docs_dir: Path, fingerprint: str) -> bool:
+        """
+        Vérifie si la documentation existante correspond aux entrées
+        
+        Si c'est le cas, la date de modification des fichiers est mise à jour
+        pour refléter la nouvelle exécution.
+        
+        Args:
+            docs_dir: Répertoire de documentation
+            fingerprint: Empreinte des entrées courantes
+            
+        Returns:
+            bool: True si la génération peut être évitée
+        """
+        try:
+            if (docs_dir / DOCS_HASH_FILE).read_text() != fingerprint:
+                return False
+            for path in self._docs_files(docs_dir):
+                os.utime(path)
+        except OSError:
+            return False
+        return True
+    
+    def _docs_output(self, docs_dir: Path, errors: List[str], logs: List[str]) -> AgentOutput:
+        """Construit le résultat de l'agent à partir des chemins connus"""
+        generated_files = self._docs_files(docs_dir)
+        readme_path, arch_path, runbook_path, troubleshooting_path, config_path, _ = generated_files
+        
+        return AgentOutput(
+            agent_name=self.agent_name,
+            success=True,
+            data={
+                "docs_directory": str(docs_dir),
+                "readme_path": str(readme_path),
+                "architecture_path": str(arch_path),
+                "runbook_path": str(runbook_path),
+                "troubleshooting_path": str(troubleshooting_path),
+                "config_path": str(config_path),
+                "generated_files": [str(f) for f in generated_files],
+                "summary": f"Documentation generated in {docs_dir.name}"
+            },
+            errors=errors,
+            logs=logs,
+        )
+    
+    @staticmethod
+    def _write_files(pending_writes: List[Tuple[Path, Union[str, bytes]]]) -> None:
+        """
+        Écrit les fichiers générés en une seule passe
+        
+        Chaque fichier est écrit par write_bytes (os.open + os.write), sans
+        passer par la couche TextIOWrapper de write_text.
+        
+        Args:
+            pending_writes: Liste de (chemin, contenu texte ou déjà encodé)
+        """
+        for path, content in pending_writes:
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            write_bytes(path, content)
+    
     def _generate_readme(
         self,
         docs_dir: Path,
         workflow_id: str,
+        generated_at: datetime,
         config: Dict[str, Any],
         planner_output: Dict[str, Any],
         infra_output: Dict[str, Any],
         monitoring_output: Dict[str, Any],
         validation_output: Dict[str, Any]
-    ) -> Path:
+    ) -> Tuple[Path, str]:
         """Génère le README principal"""
         
-        platform = config.get("platform", "k3s")
-        environment = config.get("environment", "development")
-        nodes = config.get("nodes", 1)
+        monitoring = config.get("monitoring") or {}
+        monitoring_status = validation_output.get("monitoring_status") or {}
         
-        grafana_url = monitoring_output.get("grafana_url", "N/A")
-        prometheus_url = monitoring_output.get("prometheus_url", "N/A")
-        health_score = validation_output.get("health_score", "N/A")
+        # Listes construites en un seul join (une ligne par élément)
+        addons_block = "".join(
+            f"- ✅ {addon}\n"
+            for addon, enabled in (config.get("addons") or {}).items()
+            if enabled
+        )
+        dashboards_block = "".join(
+            f"  - {dashboard}\n" for dashboard in monitoring_output.get("dashboards") or []
+        )
         
-        content = f"""# Cluster Kubernetes - {workflow_id}
-
-## 📋 Informations Générales
-
-- **Workflow ID**: `{workflow_id}`
-- **Plateforme**: {platform.upper()}
-- **Environnement**: {environment}
-- **Nombre de nœuds**: {nodes}
-- **Date de création**: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-- **Score de santé**: {health_score}/100
-
-## 🏗️ Architecture
-
-Ce cluster a été automatiquement provisionné et configuré via le système Terraform K8s Agent.
-
-### Composants Déployés
-
-#### Infrastructure
-- **Plateforme**: {platform}
-- **Nodes**: {nodes} nœuds
-- **Version Kubernetes**: {config.get('kubernetes_version', '1.28')}
-
-#### Monitoring
-- **Prometheus**: {prometheus_url}
-- **Grafana**: {grafana_url}
-  - Username: `admin`
-  - Password: `{config.get('monitoring', {}).get('grafana_password', 'admin')}`
-
-#### Addons
-"""
-        
-        addons = config.get('addons', {})
-        for addon, enabled in addons.items():
-            if enabled:
-                content += f"- ✅ {addon}\n"
-        
-        content += f"""
-## 🚀 Accès au Cluster
-
-### Kubeconfig
-
-```bash
-export KUBECONFIG={infra_output.get('kubeconfig_path', 'N/A')}
-kubectl get nodes
-kubectl get pods --all-namespaces
-```
-
-### Monitoring
-
-#### Grafana
-- URL: {grafana_url}
-- Dashboards pré-configurés:
-"""
-        
-        for dashboard in monitoring_output.get('dashboards', []):
-            content += f"  - {dashboard}\n"
+        content = _JINJA_ENV.get_template("readme.md.j2").render(
+            workflow_id=workflow_id,
+            platform=config.get("platform", "k3s"),
+            environment=config.get("environment", "development"),
+            nodes=config.get("nodes", 1),
+            kubernetes_version=config.get("kubernetes_version", "1.28"),
+            created_at=generated_at.strftime("%Y-%m-%d %H:%M:%S"),
+            grafana_url=monitoring_output.get("grafana_url", "N/A"),
+            grafana_password=monitoring.get("grafana_password", "admin"),
+            prometheus_url=monitoring_output.get("prometheus_url", "N/A"),
+            dashboards_block=dashboards_block,
+            addons_block=addons_block,
+            kubeconfig_path=infra_output.get("kubeconfig_path", "N/A"),
+            workspace=infra_output.get("workspace", "N/A"),
+            health_score=validation_output.get("health_score", "N/A"),
+            targets_up=(monitoring_status.get("targets") or {}).get("up", "N/A"),
+            nodes_ready=validation_output.get("nodes_ready", "N/A"),
+            pods_running=validation_output.get("pods_running", "N/A"),
+            capacity=validation_output.get("capacity") or {},
+        )
         
-        content += f"""
-#### Prometheus
-- URL: {prometheus_url}
-- Targets: {validation_output.get('monitoring_status', {}).get('targets', {}).get('up', 'N/A')} up
-
-## 📊 État du Cluster
-
-### Nœuds
-```
-{validation_output.get('nodes_ready', 'N/A')} nœuds ready
-```
-
-### Pods
-```
-{validation_output.get('pods_running', 'N/A')} pods running
-```
-
-### Capacité
-- **CPU**: {validation_output.get('capacity', {}).get('cpu', 'N/A')}
-- **Memory**: {validation_output.get('capacity', {}).get('memory', 'N/A')}
-- **Storage**: {validation_output.get('capacity', {}).get('storage', 'N/A')}
-
-## 📚 Documentation
-
-- [Architecture détaillée](ARCHITECTURE.md)
-- [Runbook opérationnel](RUNBOOK.md)
-- [Guide de troubleshooting](TROUBLESHOOTING.md)
-- [Configurations exportées](configs/)
-
-## 🔧 Commandes Utiles
-
-### Vérifier la santé du cluster
-```bash
-kubectl get nodes
-kubectl get pods --all-namespaces
-kubectl top nodes
-kubectl top pods --all-namespaces
-```
-
-### Accéder aux logs
-```bash
-# Logs Prometheus
-kubectl logs -n monitoring -l app=prometheus
-
-# Logs Grafana
-kubectl logs -n monitoring -l app=grafana
-```
-
-### Port-forwarding local
-```bash
-# Grafana
-kubectl port-forward -n monitoring svc/grafana 3000:3000
-
-# Prometheus
-kubectl port-forward -n monitoring svc/prometheus 9090:9090
-```
-
-## 🆘 Support
-
-En cas de problème, consultez le [guide de troubleshooting](TROUBLESHOOTING.md) ou les logs des agents:
-- Planner: Analyse et optimisation de la configuration
-- Infrastructure: Provisioning Terraform
-- Monitoring: Déploiement Prometheus/Grafana
-- Validation: Vérifications de santé
-
-## 🗑️ Destruction
-
-Pour détruire ce cluster:
-
-```bash
-cd {infra_output.get('workspace', 'N/A')}
-terraform destroy -auto-approve
-```
-
----
-*Documentation générée automatiquement par Terraform K8s Agent*
-"""
-        
-        readme_path = docs_dir / "README.md"
-        readme_path.write_text(content)
-        return readme_path
+        return docs_dir / "README.md", content
     
     def _generate_architecture_doc(
         self,
@@ -320,104 +509,37 @@ terraform destroy -auto-approve
         config: Dict[str, Any],
         infra_output: Dict[str, Any],
         monitoring_output: Dict[str, Any]
-    ) -> Path:
+    ) -> Tuple[Path, str]:
         """Génère la documentation d'architecture"""
         
-        platform = config.get("platform", "k3s")
+        networking = config.get("networking") or {}
+        resources = config.get("resources") or {}
+        security = config.get("security") or {}
+        monitoring = config.get("monitoring") or {}
         
-        content = f"""# Architecture du Cluster
-
-## Vue d'Ensemble
-
-Ce document décrit l'architecture du cluster Kubernetes déployé sur **{platform}**.
-
-## Infrastructure
-
-### Plateforme: {platform.upper()}
-
-#### Configuration Réseau
-- **Pod CIDR**: {config.get('networking', {}).get('pod_cidr', '10.244.0.0/16')}
-- **Service CIDR**: {config.get('networking', {}).get('service_cidr', '10.96.0.0/16')}
-
-#### Nœuds
-- **Nombre**: {config.get('nodes', 1)}
-- **Type**: {config.get('resources', {}).get('instance_type', 'N/A')}
-- **CPU**: {config.get('resources', {}).get('cpu', 'N/A')}
-- **Memory**: {config.get('resources', {}).get('memory', 'N/A')}
-
-## Stack Monitoring
-
-### Prometheus
-- **Namespace**: monitoring
-- **Retention**: {config.get('monitoring', {}).get('retention', '15d')}
-- **Scrape Interval**: 15s
-
-#### Targets
-- kubernetes-nodes
-- kubernetes-pods
-- kubernetes-services
-
-### Grafana
-- **Namespace**: monitoring
-- **Datasource**: Prometheus (par défaut)
-- **Dashboards**: {len(monitoring_output.get('dashboards', []))} pré-configurés
-
-## Sécurité
-
-### RBAC
-- **Activé**: {config.get('security', {}).get('rbac_enabled', True)}
-
-### Network Policies
-- **Activées**: {config.get('security', {}).get('network_policies', False)}
-
-### Pod Security
-- **Policy activée**: {config.get('security', {}).get('pod_security_policy', False)}
-
-## Addons
-
-### Installés
-"""
-        
-        for addon, enabled in config.get('addons', {}).items():
-            status = "✅" if enabled else "❌"
-            content += f"- {status} **{addon}**\n"
-        
-        content += """
-## Flux de Données
-
-1. **Metrics Collection**: Les node-exporters et kube-state-metrics collectent les métriques
-2. **Prometheus**: Scrape et stocke les métriques
-3. **Grafana**: Visualise les métriques depuis Prometheus
-4. **Alertmanager**: (si configuré) Gère les alertes
-
-## Haute Disponibilité
-
-"""
-        
-        if config.get('environment') == 'production':
-            content += """
-- Multi-nodes pour la redondance
-- Prometheus avec retention longue
-- Sauvegardes automatiques configurées
-"""
-        else:
-            content += """
-- Configuration simple-node (non-production)
-- Retention courte pour économiser les ressources
-"""
+        addons_block = "".join(
+            f"- {'✅' if enabled else '❌'} **{addon}**\n"
+            for addon, enabled in (config.get("addons") or {}).items()
+        )
         
-        content += """
-## Schéma d'Architecture
-
-Voir [ARCHITECTURE_DIAGRAM.txt](ARCHITECTURE_DIAGRAM.txt)
-
----
-*Généré automatiquement*
-"""
+        content = _JINJA_ENV.get_template("architecture.md.j2").render(
+            platform=config.get("platform", "k3s"),
+            nodes=config.get("nodes", 1),
+            pod_cidr=networking.get("pod_cidr", "10.244.0.0/16"),
+            service_cidr=networking.get("service_cidr", "10.96.0.0/16"),
+            instance_type=resources.get("instance_type", "N/A"),
+            cpu=resources.get("cpu", "N/A"),
+            memory=resources.get("memory", "N/A"),
+            retention=monitoring.get("retention", "15d"),
+            dashboards=monitoring_output.get("dashboards") or [],
+            rbac_enabled=security.get("rbac_enabled", True),
+            network_policies=security.get("network_policies", False),
+            pod_security_policy=security.get("pod_security_policy", False),
+            addons_block=addons_block,
+            high_availability=_HA_PROD if config.get("environment") == "production" else _HA_DEV,
+        )
         
-        arch_path = docs_dir / "ARCHITECTURE.md"
-        arch_path.write_text(content)
-        return arch_path
+        return docs_dir / "ARCHITECTURE.md", content
     
     def _generate_runbook(
         self,
@@ -425,445 +547,65 @@ Voir [ARCHITECTURE_DIAGRAM.txt](ARCHITECTURE_DIAGRAM.txt)
         config: Dict[str, Any],
         infra_output: Dict[str, Any],
         monitoring_output: Dict[str, Any]
-    ) -> Path:
+    ) -> Tuple[Path, str]:
         """Génère le runbook opérationnel"""
         
-        content = f"""# Runbook Opérationnel
-
-## 🔍 Monitoring Quotidien
-
-### Vérifications Journalières
-
-```bash
-# Vérifier les nœuds
-kubectl get nodes
-
-# Vérifier les pods critiques
-kubectl get pods -n kube-system
-kubectl get pods -n monitoring
-
-# Vérifier les events
-kubectl get events --sort-by='.lastTimestamp'
-```
-
-### Métriques à Surveiller
-
-#### Dans Grafana ({monitoring_output.get('grafana_url', 'N/A')})
-- **CPU Utilization**: doit rester < 80%
-- **Memory Utilization**: doit rester < 85%
-- **Disk Usage**: doit rester < 80%
-- **Pod Restarts**: max 3 restarts / 1h
-
-#### Dans Prometheus ({monitoring_output.get('prometheus_url', 'N/A')})
-- Vérifier que tous les targets sont UP
-- Vérifier qu'il n'y a pas de gaps dans les métriques
-
-## 🚨 Procédures d'Urgence
-
-### Nœud Down
-
-```bash
-# 1. Identifier le nœud
-kubectl get nodes
-
-# 2. Vérifier les logs
-kubectl describe node <node-name>
-
-# 3. Drainer le nœud si nécessaire
-kubectl drain <node-name> --ignore-daemonsets --delete-emptydir-data
-
-# 4. Redémarrer ou remplacer le nœud
-```
-
-### Pod CrashLooping
-
-```bash
-# 1. Identifier le pod
-kubectl get pods --all-namespaces | grep -v Running
-
-# 2. Vérifier les logs
-kubectl logs <pod-name> -n <namespace>
-kubectl logs <pod-name> -n <namespace> --previous  # Logs du container précédent
-
-# 3. Décrire le pod
-kubectl describe pod <pod-name> -n <namespace>
-
-# 4. Redémarrer si nécessaire
-kubectl delete pod <pod-name> -n <namespace>
-```
-
-### Prometheus Down
-
-```bash
-# 1. Vérifier le statut
-kubectl get pods -n monitoring -l app=prometheus
-
-# 2. Vérifier les logs
-kubectl logs -n monitoring -l app=prometheus
-
-# 3. Redémarrer
-kubectl rollout restart deployment/prometheus -n monitoring
-```
-
-### Grafana Inaccessible
-
-```bash
-# 1. Vérifier le service
-kubectl get svc -n monitoring grafana
-
-# 2. Vérifier le pod
-kubectl get pods -n monitoring -l app=grafana
-
-# 3. Port-forward manuel
-kubectl port-forward -n monitoring svc/grafana 3000:3000
-```
-
-## 🔄 Opérations de Maintenance
-
-### Mise à Jour des Composants
-
-#### Prometheus
-```bash
-# Edit la configuration
-kubectl edit configmap prometheus-config -n monitoring
-
-# Reload Prometheus
-kubectl exec -n monitoring prometheus-0 -- kill -HUP 1
-```
-
-#### Grafana
-```bash
-# Mettre à jour les dashboards
-kubectl apply -f dashboards/
-
-# Redémarrer Grafana
-kubectl rollout restart deployment/grafana -n monitoring
-```
-
-### Backups
-
-#### Prometheus Data
-```bash
-# Snapshot des données
-kubectl exec -n monitoring prometheus-0 -- curl -XPOST http://localhost:9090/api/v1/admin/tsdb/snapshot
-```
-
-#### Grafana Dashboards
-```bash
-# Export des dashboards via API
-# (voir scripts de backup)
-```
-
-## 📈 Scaling
-
-### Scale Up des Nœuds
-
-```bash
-# Modifier le count dans Terraform
-cd {infra_output.get('workspace', 'N/A')}
-# Éditer terraform.tfvars: nodes = X
-terraform apply
-```
-
-### Scale des Pods
-
-```bash
-# Scale horizontal
-kubectl scale deployment <deployment-name> --replicas=X -n <namespace>
-
-# Ou utiliser HPA
-kubectl autoscale deployment <deployment-name> --min=2 --max=10 --cpu-percent=80 -n <namespace>
-```
-
-## 📊 Rapports
-
-### Générer un Rapport de Santé
-
-```bash
-# Nodes
-kubectl get nodes -o wide
-
-# Pods
-kubectl get pods --all-namespaces -o wide
-
-# Ressources
-kubectl top nodes
-kubectl top pods --all-namespaces
-
-# Events récents
-kubectl get events --sort-by='.lastTimestamp' | head -20
-```
-
----
-*Maintenir ce runbook à jour après chaque changement*
-"""
+        content = _JINJA_ENV.get_template("runbook.md.j2").render(
+            grafana_url=monitoring_output.get("grafana_url", "N/A"),
+            prometheus_url=monitoring_output.get("prometheus_url", "N/A"),
+            workspace=infra_output.get("workspace", "N/A"),
+        )
         
-        runbook_path = docs_dir / "RUNBOOK.md"
-        runbook_path.write_text(content)
-        return runbook_path
+        return docs_dir / "RUNBOOK.md", content
     
     def _generate_troubleshooting(
         self,
         docs_dir: Path,
         platform: str,
         monitoring_output: Dict[str, Any]
-    ) -> Path:
+    ) -> Tuple[Path, str]:
         """Génère le guide de troubleshooting"""
         
-        content = f"""# Guide de Troubleshooting
-
-## ❌ Problèmes Courants
-
-### 1. Nœud Not Ready
-
-**Symptômes**:
-```bash
-kubectl get nodes
-NAME     STATUS     ROLES    AGE   VERSION
-node-1   NotReady   <none>   1d    v1.28.0
-```
-
-**Diagnostic**:
-```bash
-# Vérifier les détails
-kubectl describe node node-1
-
-# Vérifier kubelet
-systemctl status kubelet
-
-# Vérifier les logs
-journalctl -u kubelet -f
-```
-
-**Solutions**:
-- Redémarrer kubelet: `systemctl restart kubelet`
-- Vérifier la connectivity réseau
-- Vérifier les ressources disponibles (disk, memory)
-
-### 2. Pod Pending
-
-**Symptômes**:
-```bash
-kubectl get pods
-NAME    READY   STATUS    RESTARTS   AGE
-app-1   0/1     Pending   0          5m
-```
-
-**Diagnostic**:
-```bash
-kubectl describe pod app-1
-# Regarder les Events
-```
-
-**Causes communes**:
-- Ressources insuffisantes (CPU/Memory)
-- Node selector ne matche aucun nœud
-- PV non disponible
-- Taints sur les nœuds
-
-**Solutions**:
-- Ajouter des nœuds
-- Ajuster les requests/limits
-- Vérifier les labels et selectors
-
-### 3. ImagePullBackOff
-
-**Symptômes**:
-```bash
-NAME    READY   STATUS             RESTARTS   AGE
-app-1   0/1     ImagePullBackOff   0          2m
-```
-
-**Diagnostic**:
-```bash
-kubectl describe pod app-1
-# Vérifier "Failed to pull image"
-```
-
-**Solutions**:
-- Vérifier que l'image existe
-- Vérifier les credentials (imagePullSecrets)
-- Vérifier la connectivity au registry
-
-### 4. CrashLoopBackOff
-
-**Symptômes**:
-```bash
-NAME    READY   STATUS              RESTARTS   AGE
-app-1   0/1     CrashLoopBackOff    5          5m
-```
-
-**Diagnostic**:
-```bash
-# Logs actuels
-kubectl logs app-1
-
-# Logs du container précédent
-kubectl logs app-1 --previous
-
-# Describe
-kubectl describe pod app-1
-```
-
-**Solutions communes**:
-- Corriger l'erreur applicative  
-- Ajuster les probes (liveness/readiness)
-- Vérifier les variables d'environnement
-- Vérifier les volumes montés
-
-### 5. Prometheus Ne Scrape Pas
-
-**Symptômes**:
-- Targets "Down" dans Prometheus
-- Métriques manquantes dans Grafana
-
-**Diagnostic**:
-```bash
-# Vérifier les targets
-# Aller sur {monitoring_output.get('prometheus_url', 'N/A')}/targets
-
-# Vérifier les ServiceMonitors
-kubectl get servicemonitors -n monitoring
-
-# Logs Prometheus
-kubectl logs -n monitoring -l app=prometheus
-```
-
-**Solutions**:
-- Vérifier les labels des services/pods
-- Vérifier les ServiceMonitors
-- Vérifier les NetworkPolicies
-- Redémarrer Prometheus
-
-### 6. Grafana Dashboard Vide
-
-**Symptômes**:
-- Dashboards sans données
-- "No data" dans les panels
-
-**Diagnostic**:
-```bash
-# Vérifier le datasource dans Grafana
-# Settings > Data Sources
-
-# Tester dans Prometheus directement
-# Query: up{{}}
-```
-
-**Solutions**:
-- Vérifier que Prometheus scrape les données
-- Vérifier les queries PromQL
-- Vérifier la time range
-- Refresh le datasource
-
-## 🔍 Commandes de Diagnostic
-
-### Informations Cluster
-```bash
-kubectl cluster-info
-kubectl version
-kubectl get componentstatuses
-```
-
-### État des Ressources
-```bash
-kubectl get all --all-namespaces
-kubectl get events --all-namespaces --sort-by='.lastTimestamp'
-kubectl top nodes
-kubectl top pods --all-namespaces
-```
-
-### Logs
-```bash
-# Logs d'un pod
-kubectl logs <pod-name> -n <namespace>
-kubectl logs <pod-name> -n <namespace> -f  # Follow
-kubectl logs <pod-name> -n <namespace> --previous  # Container précédent
-
-# Logs d'un container spécifique
-kubectl logs <pod-name> -c <container-name> -n <namespace>
-```
-
-### Exec dans un Pod
-```bash
-kubectl exec -it <pod-name> -n <namespace> -- /bin/sh
-kubectl exec -it <pod-name> -n <namespace> -- /bin/bash
-```
-
-### Debug
-```bash
-# Créer un pod de debug
-kubectl run debug --image=busybox --rm -it -- /bin/sh
-
-# Debug réseau
-kubectl run debug-net --image=nicolaka/netshoot --rm -it -- /bin/sh
-```
-
-## 📱 Contacts & Escalade
-
-### Niveau 1 - Self-Service
-- Consulter ce guide
-- Consulter le [Runbook](RUNBOOK.md)
-- Vérifier les logs et métriques
-
-### Niveau 2 - Support
-- Contacter l'équipe plateforme
-- Fournir: workflow ID, logs, captures Grafana
-
-### Niveau 3 - Escalade
-- Incident critique affectant la production
-- Perte de données
-- Cluster inaccessible
-
-## 🔗 Ressources Utiles
-
-- Kubernetes Documentation: https://kubernetes.io/docs/
-- Prometheus Documentation: https://prometheus.io/docs/
-- Grafana Documentation: https://grafana.com/docs/
-
----
-*Guide mis à jour régulièrement*
-"""
+        content = _render_troubleshooting(
+            platform,
+            monitoring_output.get("prometheus_url", "N/A"),
+        )
         
-        troubleshooting_path = docs_dir / "TROUBLESHOOTING.md"
-        troubleshooting_path.write_text(content)
-        return troubleshooting_path
+        return docs_dir / "TROUBLESHOOTING.md", content
     
     def _export_configurations(
         self,
-        docs_dir: Path,
+        configs_dir: Path,
         workflow_id: str,
+        generated_at: datetime,
         config: Dict[str, Any],
         infra_output: Dict[str, Any]
-    ) -> Path:
-        """Exporte les configurations"""
-        
-        configs_dir = docs_dir / "configs"
-        configs_dir.mkdir(exist_ok=True)
+    ) -> List[Tuple[Path, bytes]]:
+        """
+        Exporte les configurations
         
-        # Config complète en JSON
-        config_json = configs_dir / "cluster-config.json"
-        config_json.write_text(json.dumps(config, indent=2))
+        La config du cluster, les infos Terraform et les métadonnées du
+        workflow sont regroupées dans un seul cluster-config.json.
+        """
         
-        # Info Terraform
-        terraform_info = {
-            "workspace": infra_output.get("workspace"),
-            "outputs": infra_output.get("outputs", {}),
-        }
-        terraform_json = configs_dir / "terraform-info.json"
-        terraform_json.write_text(json.dumps(terraform_info, indent=2))
-        
-        # Export metadata
-        metadata = {
-            "workflow_id": workflow_id,
-            "created_at": datetime.now().isoformat(),
-            "platform": config.get("platform"),
-            "environment": config.get("environment"),
+        bundle = {
+            # Config complète
+            "cluster": config,
+            # Info Terraform
+            "terraform": {
+                "workspace": infra_output.get("workspace"),
+                "outputs": infra_output.get("outputs", {}),
+            },
+            # Metadata du workflow
+            "metadata": {
+                "workflow_id": workflow_id,
+                "created_at": generated_at.isoformat(),
+                "platform": config.get("platform"),
+                "environment": config.get("environment"),
+            },
         }
-        metadata_json = configs_dir / "metadata.json"
-        metadata_json.write_text(json.dumps(metadata, indent=2))
         
-        return configs_dir
+        return [(configs_dir / "cluster-config.json", _dump_json(bundle))]
     
     def _generate_architecture_diagram(
         self,
@@ -873,66 +615,13 @@ kubectl run debug-net --image=nicolaka/netshoot --rm -it -- /bin/sh
         """Génère un diagramme ASCII de l'architecture"""
         
         platform = config.get("platform", "k3s").upper()
-        nodes = config.get("nodes", 1)
-        
-        diagram = f"""
-╔════════════════════════════════════════════════════════════════╗
-║              ARCHITECTURE - {platform} CLUSTER                      ║
-╚════════════════════════════════════════════════════════════════╝
-
-┌──────────────────────────────────────────────────────────────┐
-│                      CONTROL PLANE                            │
-│  ┌──────────────┐  ┌──────────────┐  ┌──────────────┐      │
-│  │  API Server  │  │  Scheduler   │  │   etcd       │      │
-│  └──────────────┘  └──────────────┘  └──────────────┘      │
-└──────────────────────────────────────────────────────────────┘
-                            │
-        ┌───────────────────┼───────────────────┐
-        │                   │                   │
-┌───────▼────────┐  ┌───────▼────────┐  ┌──────▼─────────┐
-│   WORKER NODE  │  │   WORKER NODE  │  │  WORKER NODE   │
-│    (node-1)    │  │    (node-2)    │  │   (node-3)     │
-│                │  │                │  │                │
-│  ┌──────────┐  │  │  ┌──────────┐  │  │  ┌──────────┐  │
-│  │  Kubelet │  │  │  │  Kubelet │  │  │  │  Kubelet │  │
-│  └──────────┘  │  │  └──────────┘  │  │  └──────────┘  │
-│  ┌──────────┐  │  │  ┌──────────┐  │  │  ┌──────────┐  │
-│  │Application│  │  │  │Application│  │  │  │Application│  │
-│  │   Pods   │  │  │  │   Pods   │  │  │  │   Pods   │  │
-│  └──────────┘  │  │  └──────────┘  │  │  └──────────┘  │
-└────────────────┘  └────────────────┘  └────────────────┘
-
-┌──────────────────────────────────────────────────────────────┐
-│                    MONITORING STACK                           │
-│  ┌──────────────────────┐    ┌─────────────────────────┐    │
-│  │     PROMETHEUS       │◄───│       GRAFANA           │    │
-│  │  (Metrics Storage)   │    │   (Visualization)       │    │
-│  │                      │    │                         │    │
-│  │  • Scrape Interval   │    │  • Dashboards           │    │
-│  │  • Alert Rules       │    │  • User Auth            │    │
-│  │  • Retention: {config.get('monitoring', {}).get('retention', '15d'):6} │    │  • Datasources          │    │
-│  └──────────────────────┘    └─────────────────────────┘    │
-│           ▲                            │                      │
-│           │ scrapes                    │ queries              │
-│           │                            ▼                      │
-│  ┌────────┴────────┐         ┌──────────────────┐           │
-│  │  ServiceMonitor │         │     Users        │           │
-│  │   kube-state    │         └──────────────────┘           │
-│  │   node-exporter │                                         │
-│  └─────────────────┘                                         │
-└──────────────────────────────────────────────────────────────┘
-
-┌──────────────────────────────────────────────────────────────┐
-│                      NETWORKING                               │
-│  Pod CIDR:     {config.get('networking', {}).get('pod_cidr', '10.244.0.0/16'):20}                       │
-│  Service CIDR: {config.get('networking', {}).get('service_cidr', '10.96.0.0/16'):20}                       │
-└──────────────────────────────────────────────────────────────┘
-
-Legend:
-  ▲ = Data flow up
-  ▼ = Data flow down
-  ◄─ = Connection
-  └─ = Hierarchy
-"""
+        nodes = max(1, int(config.get("nodes", 1)))
+        monitoring = config.get("monitoring") or {}
+        networking = config.get("networking") or {}
         
-        return diagram
+        return _architecture_diagram_for(nodes).substitute(
+            platform=platform,
+            retention=f"{monitoring.get('retention', '15d'):6}",
+            pod_cidr=f"{networking.get('pod_cidr', '10.244.0.0/16'):20}",
+            service_cidr=f"{networking.get('service_cidr', '10.96.0.0/16'):20}",
+        )
@@ -2,14 +2,299 @@
 Infrastructure Agent
 Agent responsable du provisioning de l'infrastructure via Terraform
 """
+import hashlib
+import json
 import os
+import shutil
 import subprocess
+import threading
+import weakref
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from string import Template
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
-from python_terraform import IsFlagged, Terraform
+import yaml
 
 from core.agent_base import AgentInput, AgentOutput, BaseAgent
+from core.fileutils import data_fingerprint, write_bytes
+
+# Empreinte de la configuration du dernier apply réussi d'un workspace
+CONFIG_HASH_FILE = ".cfg_hash"
+
+# Outputs Terraform mis en cache dans le workspace
+OUTPUTS_CACHE_FILE = "outputs.json"
+
+# Plan sauvegardé par terraform plan puis appliqué tel quel par terraform apply
+PLAN_FILE = "tfplan"
+
+# Événements terraform -json relayés dans les logs pendant l'exécution
+# (apply_progress est émis toutes les 10s par ressource: trop bavard)
+TF_PROGRESS_EVENTS = frozenset({"apply_complete", "apply_errored", "change_summary"})
+
+# Variables d'environnement Terraform pour une exécution non interactive:
+# pas de prompt, et pas d'appel HTTP de vérification de version
+# (checkpoint.hashicorp.com) à chaque commande
+TF_ENV_DEFAULTS = {
+    "TF_IN_AUTOMATION": "1",
+    "TF_INPUT": "0",
+    "CHECKPOINT_DISABLE": "1",
+}
+
+# Lignes non-JSON conservées pour le message d'erreur (les dernières)
+TF_OUTPUT_TAIL_LINES = 50
+
+# main.tf K3s, mode réel: installation K3s véritable
+_K3S_REAL_MAIN_TF = Template("""
+terraform {
+  required_providers {
+    local = {
+      source  = "hashicorp/local"
+      version = "~> 2.4"
+    }
+    null = {
+      source  = "hashicorp/null"
+      version = "~> 3.2"
+    }
+  }
+}
+
+# K3s Server Node (Control Plane)
+resource "null_resource" "k3s_server" {
+  provisioner "local-exec" {
+    command = <<-EOT
+      echo "🚀 Installing K3s server..."
+      curl -sfL https://get.k3s.io | sh -s - \\
+        --write-kubeconfig-mode 644 \\
+        --node-name k3s-server
+      
+      # Wait for K3s to be ready
+      echo "⏳ Waiting for K3s to be ready..."
+      timeout 60 bash -c 'until kubectl get nodes 2>/dev/null; do sleep 2; done'
+      echo "✅ K3s server is ready!"
+      
+      # Copy kubeconfig to output directory
+      sudo cp /etc/rancher/k3s/k3s.yaml $${path.module}/kubeconfig
+      sudo chmod 644 $${path.module}/kubeconfig
+      echo "📋 Kubeconfig saved to $${path.module}/kubeconfig"
+    EOT
+  }
+}
+
+# Read the kubeconfig file after it's created
+data "local_file" "kubeconfig" {
+  depends_on = [null_resource.k3s_server]
+  filename   = "$${path.module}/kubeconfig"
+}
+""")
+
+# main.tf K3s, mode démo: simulation rapide
+_K3S_DEMO_MAIN_TF = Template("""
+terraform {
+  required_providers {
+    local = {
+      source  = "hashicorp/local"
+      version = "~> 2.4"
+    }
+    null = {
+      source  = "hashicorp/null"
+      version = "~> 3.2"
+    }
+  }
+}
+
+# K3s cluster - pour demo/dev
+resource "null_resource" "k3s_cluster" {
+  provisioner "local-exec" {
+    command = "echo '📺 K3s cluster simulation - would deploy $nodes nodes here'"
+  }
+}
+
+# Simulated kubeconfig for demo
+resource "local_file" "kubeconfig" {
+  content  = <<-EOT
+apiVersion: v1
+kind: Config
+clusters:
+- cluster:
+    server: https://localhost:6443
+  name: k3s-cluster
+contexts:
+- context:
+    cluster: k3s-cluster
+    user: k3s-admin
+  name: k3s
+current-context: k3s
+users:
+- name: k3s-admin
+  user: {}
+EOT
+  filename = "$${path.module}/kubeconfig"
+}
+""")
+
+# main.tf EKS
+_EKS_MAIN_TF = Template("""
+terraform {
+  required_providers {
+    aws = {
+      source  = "hashicorp/aws"
+      version = "~> 5.0"
+    }
+  }
+}
+
+provider "aws" {
+  region = "$region"
+}
+
+# EKS Cluster configuration
+# Note: This is a simplified version for demonstration
+resource "null_resource" "eks_cluster" {
+  provisioner "local-exec" {
+    command = "echo 'EKS cluster simulation - would deploy in $region'"
+  }
+}
+""")
+
+# main.tf AKS (plateforme par défaut)
+_AKS_MAIN_TF = Template("""
+terraform {
+  required_providers {
+    azurerm = {
+      source  = "hashicorp/azurerm"
+      version = "~> 3.0"
+    }
+  }
+}
+
+provider "azurerm" {
+  features {}
+}
+
+# AKS Cluster configuration
+resource "null_resource" "aks_cluster" {
+  provisioner "local-exec" {
+    command = "echo 'AKS cluster simulation - would deploy in $location'"
+  }
+}
+""")
+
+# main.tf par (plateforme, mode réel): EKS et AKS ne dépendent pas du mode
+_MAIN_TF_TEMPLATES: Dict[Tuple[str, bool], Template] = {
+    ("k3s", True): _K3S_REAL_MAIN_TF,
+    ("k3s", False): _K3S_DEMO_MAIN_TF,
+    ("eks", True): _EKS_MAIN_TF,
+    ("eks", False): _EKS_MAIN_TF,
+}
+
+# variables.tf (sans substitution: écrit tel quel)
+_VARIABLES_TF = b"""
+variable "cluster_name" {
+  description = "Name of the Kubernetes cluster"
+  type        = string
+}
+
+variable "environment" {
+  description = "Environment (dev, staging, prod)"
+  type        = string
+}
+
+variable "nodes" {
+  description = "Number of nodes"
+  type        = number
+  default     = 3
+}
+
+variable "kubernetes_version" {
+  description = "Kubernetes version"
+  type        = string
+  default     = "1.28"
+}
+"""
+
+# terraform.tfvars
+_TFVARS = Template("""
+cluster_name       = "terraform-agent-cluster"
+environment        = "$environment"
+nodes              = $nodes
+kubernetes_version = "$kubernetes_version"
+""")
+
+# outputs.tf (la référence au kubeconfig dépend du mode)
+_OUTPUTS_TF = Template("""
+output "cluster_endpoint" {
+  description = "Kubernetes cluster endpoint"
+  value       = "https://localhost:6443"
+}
+
+output "kubeconfig" {
+  description = "Kubeconfig content"
+  value       = $kubeconfig_ref
+  sensitive   = true
+}
+""")
+
+
+class _TFParams(NamedTuple):
+    """Paramètres des fichiers Terraform, extraits une fois de la configuration"""
+    platform: str
+    is_real: bool
+    nodes: int
+    environment: str
+    kubernetes_version: str
+    region: str
+    location: str
+
+
+@lru_cache(maxsize=1)
+def _terraform_bin() -> str:
+    """Résout (une seule fois par process) le chemin du binaire terraform"""
+    return shutil.which("terraform") or "terraform"
+
+
+def _terraform_env(plugin_cache_dir: str) -> Dict[str, str]:
+    """
+    Environnement des commandes Terraform
+    
+    Les variables sont passées aux seuls processus terraform (env=): le
+    process et ses autres sous-processus (git...) ne sont pas modifiés.
+    Une variable déjà définie par l'utilisateur est respectée; os.environ
+    est relu à chaque commande pour suivre ses modifications.
+    
+    Args:
+        plugin_cache_dir: Cache de providers partagé entre workflows
+    
+    Returns:
+        Dict: Environnement complet du processus terraform
+    """
+    return {
+        # Cache de providers partagé: terraform init ne retélécharge plus
+        # les providers pour chaque nouveau workspace
+        "TF_PLUGIN_CACHE_DIR": plugin_cache_dir,
+        # Les workspaces n'ont pas de .terraform.lock.hcl versionné: sans
+        # cette option, Terraform ignore le cache pour ces workspaces
+        "TF_PLUGIN_CACHE_MAY_BREAK_DEPENDENCY_LOCK_FILE": "1",
+        **TF_ENV_DEFAULTS,
+        **os.environ,
+    }
+
+
+# Un verrou par workflow: deux exécutions concurrentes du même workflow
+# ne lancent jamais Terraform en même temps sur le même workspace. Les
+# références sont faibles: un verrou que plus aucun thread ne détient ni
+# n'attend disparaît du dictionnaire
+_WORKSPACE_LOCKS: "weakref.WeakValueDictionary[str, threading.Lock]" = (
+    weakref.WeakValueDictionary()
+)
+_WORKSPACE_LOCKS_GUARD = threading.Lock()
+
+
+def _workspace_lock(workflow_id: str) -> threading.Lock:
+    """Retourne le verrou du workspace Terraform d'un workflow"""
+    with _WORKSPACE_LOCKS_GUARD:
+        return _WORKSPACE_LOCKS.setdefault(workflow_id, threading.Lock())
 
 
 class InfrastructureAgent(BaseAgent):
@@ -34,6 +319,13 @@ class InfrastructureAgent(BaseAgent):
         Returns:
             AgentOutput: Résultat du provisioning
         """
+        # Les workflows distincts provisionnent en parallèle, chacun dans
+        # son propre workspace
+        with _workspace_lock(agent_input.workflow_id):
+            return self._provision(agent_input)
+    
+    def _provision(self, agent_input: AgentInput) -> AgentOutput:
+        """Provisionne l'infrastructure (workspace verrouillé)"""
         logs = []
         errors = []
         
@@ -53,34 +345,54 @@ class InfrastructureAgent(BaseAgent):
             )
             logs.append(f"Terraform workspace created: {tf_workspace}")
             
-            # Générer les fichiers Terraform
-            self._generate_terraform_files(tf_workspace, platform, config)
-            logs.append("Terraform files generated")
-            self.log_success("Terraform configuration generated")
-            
-            # Initialiser Terraform
-            tf = Terraform(working_dir=str(tf_workspace))
-            self.log("Initializing Terraform...")
-            return_code, stdout, stderr = tf.init()
+            # Fichiers Terraform identiques à ceux du dernier apply réussi:
+            # le workspace et son répertoire .terraform sont déjà à jour
+            params, tf_files = self._render_terraform_files(platform, config)
+            config_hash = self._config_hash(tf_files)
+            workspace_up_to_date = self._workspace_up_to_date(tf_workspace, config_hash)
             
-            if return_code != 0:
-                error_msg = stderr if stderr else stdout
-                errors.append(f"Terraform init failed: {error_msg}")
-                self.log_error(f"Terraform initialization failed: {error_msg}")
-                logs.append(f"Init error: {error_msg}")
+            if workspace_up_to_date:
+                logs.append("Terraform configuration unchanged, generation and init skipped")
+                self.log_success("Terraform workspace up to date")
             else:
-                logs.append("Terraform initialized")
-                self.log_success("Terraform initialized")
+                # Écrire les fichiers Terraform
+                self._generate_terraform_files(tf_workspace, tf_files)
+                logs.append("Terraform files generated")
+                self.log_success("Terraform configuration generated")
+                
+                # Nouveau workspace: reprendre le .terraform d'un workspace
+                # modèle déjà initialisé (terraform init n'a plus rien à
+                # résoudre ni à installer)
+                if self._seed_from_template(tf_workspace, params):
+                    logs.append("Terraform providers seeded from template workspace")
+                
+                # Initialiser Terraform
+                self.log("Initializing Terraform...")
+                return_code, error_msg = self._run_terraform(
+                    tf_workspace, "init", "-input=false", "-no-color"
+                )
+                
+                if return_code != 0:
+                    errors.append(f"Terraform init failed: {error_msg}")
+                    self.log_error(f"Terraform initialization failed: {error_msg}")
+                    logs.append(f"Init error: {error_msg}")
+                else:
+                    logs.append("Terraform initialized")
+                    self.log_success("Terraform initialized")
             
             # Plan Terraform
+            plan_return_code = None
             if not errors:
                 self.log("Creating Terraform plan...")
-                return_code, stdout, stderr = tf.plan()
+                return_code, error_msg = self._run_terraform(
+                    tf_workspace,
+                    "plan", "-input=false", "-detailed-exitcode", f"-out={PLAN_FILE}", "-json"
+                )
+                plan_return_code = return_code
                 
                 # Terraform plan return codes:
                 # 0 = no changes, 1 = error, 2 = changes planned (success!)
                 if return_code == 1:
-                    error_msg = stderr if stderr else stdout
                     errors.append(f"Terraform plan failed: {error_msg}")
                     self.log_error(f"Terraform plan failed: {error_msg}")
                     logs.append(f"Plan error: {error_msg}")
@@ -94,22 +406,38 @@ class InfrastructureAgent(BaseAgent):
             # Apply Terraform
             if not errors and not self.config.debug:  # Skip apply in debug mode
                 self.log("Applying Terraform configuration...")
-                return_code, stdout, stderr = tf.apply(skip_plan=True, auto_approve=IsFlagged)
+                # Le plan sauvegardé est appliqué directement, sans
+                # recalculer un second plan
+                return_code, error_msg = self._run_terraform(
+                    tf_workspace, "apply", "-input=false", "-auto-approve", "-json", PLAN_FILE,
+                    on_event=self.log,
+                )
                 
                 if return_code != 0:
-                    errors.append(f"Terraform apply failed: {stderr}")
+                    errors.append(f"Terraform apply failed: {error_msg}")
                     self.log_error("Terraform apply failed")
                 else:
                     logs.append("Infrastructure provisioned")
                     self.log_success("Infrastructure provisioned successfully")
+                    (tf_workspace / CONFIG_HASH_FILE).write_text(config_hash)
             
-            # Récupérer les outputs
+            # Récupérer les outputs (depuis le cache si le plan n'a détecté
+            # aucun changement)
             outputs = {}
             if not errors:
-                tf_outputs = tf.output()
-                if isinstance(tf_outputs, dict):
-                    outputs = tf_outputs
-                logs.append(f"Retrieved {len(outputs)} Terraform outputs")
+                cached_outputs = None
+                if plan_return_code == 0:
+                    cached_outputs = self._load_cached_outputs(tf_workspace)
+                
+                if cached_outputs is not None:
+                    outputs = cached_outputs
+                    logs.append(f"Reused {len(outputs)} cached Terraform outputs")
+                else:
+                    tf_outputs = self._terraform_outputs(tf_workspace)
+                    if isinstance(tf_outputs, dict):
+                        outputs = tf_outputs
+                        self._save_cached_outputs(tf_workspace, outputs)
+                    logs.append(f"Retrieved {len(outputs)} Terraform outputs")
             
             # Générer le kubeconfig si disponible
             kubeconfig_path = None
@@ -175,249 +503,297 @@ class InfrastructureAgent(BaseAgent):
         Returns:
             Path: Chemin du workspace
         """
-        workspace_dir = self.config.output_dir / "terraform" / workflow_id
-        workspace_dir.mkdir(parents=True, exist_ok=True)
+        workspace_dir = self.ensure_dir(self.config.output_dir / "terraform" / workflow_id)
+        
+        # Cache de providers partagé entre workflows (voir _terraform_env)
+        if "TF_PLUGIN_CACHE_DIR" not in os.environ:
+            self.ensure_dir(self._plugin_cache_dir())
+        
         return workspace_dir
     
-    def _generate_terraform_files(
+    def _seed_from_template(self, workspace: Path, params: _TFParams) -> bool:
+        """
+        Initialise un workspace à partir d'un workspace modèle
+        
+        Un workspace modèle par plateforme/mode (et par version du main.tf)
+        est initialisé une fois avec terraform init -backend=false. Les
+        nouveaux workspaces reçoivent une copie en liens physiques de son
+        .terraform et son .terraform.lock.hcl: le terraform init qui suit
+        réutilise les providers déjà installés.
+        
+        Args:
+            workspace: Workspace à initialiser
+            params: Paramètres Terraform du workspace
+            
+        Returns:
+            bool: True si le workspace a été initialisé depuis le modèle
+        """
+        if (workspace / ".terraform").exists():
+            return False
+        
+        template_source = _MAIN_TF_TEMPLATES.get((params.platform, params.is_real), _AKS_MAIN_TF).template
+        template_name = "-".join((
+            params.platform,
+            "real" if params.is_real else "demo",
+            hashlib.sha256(template_source.encode("utf-8")).hexdigest()[:12],
+        ))
+        template_dir = self.config.data_dir / "cache" / "terraform-templates" / template_name
+        
+        with _workspace_lock(f"template:{template_name}"):
+            if not (template_dir / ".terraform.lock.hcl").exists():
+                self.ensure_dir(template_dir)
+                for name in ("main.tf", "variables.tf", "outputs.tf"):
+                    shutil.copyfile(workspace / name, template_dir / name)
+                
+                return_code, error_msg = self._run_terraform(
+                    template_dir, "init", "-backend=false", "-input=false", "-no-color"
+                )
+                if return_code != 0:
+                    self.log_warning(f"Template workspace init failed: {error_msg}")
+                    return False
+            
+            try:
+                # Les providers sont des liens symboliques vers le cache de
+                # plugins: ils sont copiés tels quels
+                shutil.copytree(
+                    template_dir / ".terraform",
+                    workspace / ".terraform",
+                    symlinks=True,
+                    copy_function=os.link,
+                )
+                # Copie réelle: terraform init peut réécrire le lock file
+                shutil.copyfile(
+                    template_dir / ".terraform.lock.hcl", workspace / ".terraform.lock.hcl"
+                )
+            except OSError as e:
+                # Ex: output_dir et data_dir sur des systèmes de fichiers
+                # différents (pas de lien physique possible)
+                self.log_warning(f"Could not seed workspace from template: {e}")
+                shutil.rmtree(workspace / ".terraform", ignore_errors=True)
+                return False
+        
+        return True
+    
+    def _plugin_cache_dir(self) -> Path:
+        """Cache de providers Terraform partagé entre workflows"""
+        return self.config.data_dir / "cache" / "terraform-plugins"
+    
+    def _run_terraform(
         self,
         workspace: Path,
+        command: str,
+        *args: str,
+        on_event: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[int, str]:
+        """
+        Exécute une commande Terraform dans un workspace
+        
+        La sortie est lue au fil de l'eau. Avec -json, chaque ligne est un
+        événement JSON: les diagnostics d'erreur sont extraits des
+        événements; seules les dernières lignes non-JSON sont conservées.
+        
+        Args:
+            workspace: Workspace Terraform (passé via -chdir)
+            command: Sous-commande (init, plan, apply...)
+            *args: Options de la sous-commande
+            on_event: Appelé avec le message de chaque événement de
+                progression et de chaque erreur, dès sa réception
+            
+        Returns:
+            Tuple[int, str]: Code de retour et message d'erreur (vide si aucun)
+        """
+        diagnostics = []
+        text_lines = deque(maxlen=TF_OUTPUT_TAIL_LINES)
+        
+        with subprocess.Popen(
+            [_terraform_bin(), f"-chdir={workspace}", command, *args],
+            env=_terraform_env(str(self._plugin_cache_dir())),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        ) as process:
+            for line in process.stdout:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    text_lines.append(line)
+                    continue
+                
+                event_type = event.get("type")
+                diagnostic = event.get("diagnostic") or {}
+                if event_type == "diagnostic" and diagnostic.get("severity") == "error":
+                    summary = diagnostic.get("summary", "")
+                    detail = diagnostic.get("detail", "")
+                    diagnostics.append(f"{summary}: {detail}" if detail else summary)
+                    if on_event:
+                        on_event(diagnostics[-1])
+                elif on_event and event_type in TF_PROGRESS_EVENTS:
+                    on_event(event.get("@message", ""))
+        
+        # plan -detailed-exitcode retourne 2 quand des changements sont prévus
+        succeeded = process.returncode == 0 or (command == "plan" and process.returncode == 2)
+        if succeeded:
+            return process.returncode, ""
+        return process.returncode, "\n".join(diagnostics) or "".join(text_lines).strip()
+    
+    def _terraform_outputs(self, workspace: Path) -> Optional[Dict[str, Any]]:
+        """
+        Récupère les outputs Terraform (terraform output -json)
+        
+        Les outputs sensibles (kubeconfig) sont absents des événements de
+        terraform apply -json: ils ne sont lisibles que via terraform output.
+        
+        Returns:
+            Dict: {nom: {"value": ..., "sensitive": ..., "type": ...}} ou None
+        """
+        result = subprocess.run(
+            [_terraform_bin(), f"-chdir={workspace}", "output", "-json"],
+            env=_terraform_env(str(self._plugin_cache_dir())),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None
+        try:
+            return json.loads(result.stdout)
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _config_hash(files: Dict[str, bytes]) -> str:
+        """
+        Calcule l'empreinte des fichiers Terraform rendus
+        
+        Les fichiers eux-mêmes sont hachés: une modification des templates
+        (main.tf, outputs.tf...) invalide le workspace comme un changement
+        de configuration.
+        
+        Args:
+            files: Contenu des fichiers par nom
+            
+        Returns:
+            str: Empreinte blake2b hexadécimale
+        """
+        return data_fingerprint({name: content.decode("utf-8") for name, content in files.items()})
+    
+    @staticmethod
+    def _workspace_up_to_date(workspace: Path, config_hash: str) -> bool:
+        """Vérifie que le workspace a déjà été appliqué avec cette configuration"""
+        hash_file = workspace / CONFIG_HASH_FILE
+        return (
+            hash_file.exists()
+            and hash_file.read_text() == config_hash
+            and (workspace / ".terraform").is_dir()
+        )
+    
+    @staticmethod
+    def _load_cached_outputs(workspace: Path) -> Optional[Dict[str, Any]]:
+        """Charge les outputs Terraform mis en cache (None si absents)"""
+        try:
+            return json.loads((workspace / OUTPUTS_CACHE_FILE).read_text())
+        except (OSError, ValueError):
+            return None
+    
+    @staticmethod
+    def _save_cached_outputs(workspace: Path, outputs: Dict[str, Any]) -> None:
+        """Met en cache les outputs Terraform (ils contiennent le kubeconfig: 0600)"""
+        fd = os.open(
+            workspace / OUTPUTS_CACHE_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+        )
+        # Le mode d'os.open ne s'applique qu'à la création du fichier
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(outputs, f)
+    
+    def _render_terraform_files(
+        self,
         platform: str,
         config: Dict[str, Any]
-    ) -> None:
+    ) -> Tuple[_TFParams, Dict[str, bytes]]:
         """
-        Génère les fichiers Terraform
+        Rend les fichiers Terraform en mémoire
         
         Args:
-            workspace: Workspace directory
             platform: Plateforme
             config: Configuration
+            
+        Returns:
+            Tuple[_TFParams, Dict[str, bytes]]: Paramètres utilisés et
+                contenu des fichiers par nom
         """
-        # Copier le module de base
-        module_source = self.config.terraform_dir / platform
-        
-        # Générer le main.tf
-        main_tf = self._generate_main_tf(platform, config)
-        (workspace / "main.tf").write_text(main_tf)
+        deployment_mode = config.get("deployment_mode", self.config.deployment_mode.value)
+        params = _TFParams(
+            platform=platform,
+            is_real=deployment_mode == "real",
+            nodes=config.get("nodes", 3),
+            environment=config.get("environment", "development"),
+            kubernetes_version=config.get("kubernetes_version", "1.28"),
+            region=config.get("eks_config", {}).get("region", "us-east-1"),
+            location=config.get("aks_config", {}).get("location", "eastus"),
+        )
         
-        # Générer le variables.tf
-        variables_tf = self._generate_variables_tf(config)
-        (workspace / "variables.tf").write_text(variables_tf)
+        files = {
+            "main.tf": self._generate_main_tf(params).encode(),
+            "variables.tf": _VARIABLES_TF,
+            "terraform.tfvars": self._generate_tfvars(params).encode(),
+            "outputs.tf": self._generate_outputs_tf(params).encode(),
+        }
+        return params, files
+    
+    @staticmethod
+    def _generate_terraform_files(workspace: Path, files: Dict[str, bytes]) -> None:
+        """
+        Écrit les fichiers Terraform rendus dans le workspace
         
-        # Générer le terraform.tfvars
-        tfvars = self._generate_tfvars(config)
-        (workspace / "terraform.tfvars").write_text(tfvars)
+        Args:
+            workspace: Workspace directory
+            files: Contenu des fichiers par nom (_render_terraform_files)
+        """
+        # Les fichiers vont changer: l'empreinte du dernier apply n'est plus
+        # valable tant qu'un nouvel apply n'a pas réussi
+        (workspace / CONFIG_HASH_FILE).unlink(missing_ok=True)
         
-        # Générer outputs.tf
-        outputs_tf = self._generate_outputs_tf(platform, config)
-        (workspace / "outputs.tf").write_text(outputs_tf)
+        # Les fichiers sont ouverts relativement au répertoire du workspace
+        # (dir_fd): le chemin complet n'est résolu qu'une fois
+        dir_fd = os.open(workspace, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            for name, content in files.items():
+                write_bytes(name, content, dir_fd=dir_fd)
+        finally:
+            os.close(dir_fd)
     
-    def _generate_main_tf(self, platform: str, config: Dict[str, Any]) -> str:
+    @staticmethod
+    def _generate_main_tf(params: _TFParams) -> str:
         """Génère le fichier main.tf"""
-        nodes = config.get("nodes", 3)
-        k8s_version = config.get("kubernetes_version", "1.28")
-        deployment_mode = config.get("deployment_mode", self.config.deployment_mode.value)
+        template = _MAIN_TF_TEMPLATES.get((params.platform, params.is_real), _AKS_MAIN_TF)
         
-        if platform == "k3s":
-            # Mode RÉEL : Installation K3s véritable
-            if deployment_mode == "real":
-                return f'''
-terraform {{
-  required_providers {{
-    local = {{
-      source  = "hashicorp/local"
-      version = "~> 2.4"
-    }}
-    null = {{
-      source  = "hashicorp/null"
-      version = "~> 3.2"
-    }}
-  }}
-}}
-
-# K3s Server Node (Control Plane)
-resource "null_resource" "k3s_server" {{
-  provisioner "local-exec" {{
-    command = <<-EOT
-      echo "🚀 Installing K3s server..."
-      curl -sfL https://get.k3s.io | sh -s - \\
-        --write-kubeconfig-mode 644 \\
-        --node-name k3s-server
-      
-      # Wait for K3s to be ready
-      echo "⏳ Waiting for K3s to be ready..."
-      timeout 60 bash -c 'until kubectl get nodes 2>/dev/null; do sleep 2; done'
-      echo "✅ K3s server is ready!"
-      
-      # Copy kubeconfig to output directory
-      sudo cp /etc/rancher/k3s/k3s.yaml ${{path.module}}/kubeconfig
-      sudo chmod 644 ${{path.module}}/kubeconfig
-      echo "📋 Kubeconfig saved to ${{path.module}}/kubeconfig"
-    EOT
-  }}
-}}
-
-# Read the kubeconfig file after it's created
-data "local_file" "kubeconfig" {{
-  depends_on = [null_resource.k3s_server]
-  filename   = "${{path.module}}/kubeconfig"
-}}
-'''
-            
-            # Mode DÉMO : Simulation rapide
-            else:
-                return f'''
-terraform {{
-  required_providers {{
-    local = {{
-      source  = "hashicorp/local"
-      version = "~> 2.4"
-    }}
-    null = {{
-      source  = "hashicorp/null"
-      version = "~> 3.2"
-    }}
-  }}
-}}
-
-# K3s cluster - pour demo/dev
-resource "null_resource" "k3s_cluster" {{
-  provisioner "local-exec" {{
-    command = "echo '📺 K3s cluster simulation - would deploy {nodes} nodes here'"
-  }}
-}}
-
-# Simulated kubeconfig for demo
-resource "local_file" "kubeconfig" {{
-  content  = <<-EOT
-apiVersion: v1
-kind: Config
-clusters:
-- cluster:
-    server: https://localhost:6443
-  name: k3s-cluster
-contexts:
-- context:
-    cluster: k3s-cluster
-    user: k3s-admin
-  name: k3s
-current-context: k3s
-users:
-- name: k3s-admin
-  user: {{}}
-EOT
-  filename = "${{path.module}}/kubeconfig"
-}}
-'''
-        elif platform == "eks":
-            region = config.get("eks_config", {}).get("region", "us-east-1")
-            return f'''
-terraform {{
-  required_providers {{
-    aws = {{
-      source  = "hashicorp/aws"
-      version = "~> 5.0"
-    }}
-  }}
-}}
-
-provider "aws" {{
-  region = "{region}"
-}}
-
-# EKS Cluster configuration
-# Note: This is a simplified version for demonstration
-resource "null_resource" "eks_cluster" {{
-  provisioner "local-exec" {{
-    command = "echo 'EKS cluster simulation - would deploy in {region}'"
-  }}
-}}
-'''
-        else:  # aks
-            location = config.get("aks_config", {}).get("location", "eastus")
-            return f'''
-terraform {{
-  required_providers {{
-    azurerm = {{
-      source  = "hashicorp/azurerm"
-      version = "~> 3.0"
-    }}
-  }}
-}}
-
-provider "azurerm" {{
-  features {{}}
-}}
-
-# AKS Cluster configuration
-resource "null_resource" "aks_cluster" {{
-  provisioner "local-exec" {{
-    command = "echo 'AKS cluster simulation - would deploy in {location}'"
-  }}
-}}
-'''
-    
-    def _generate_variables_tf(self, config: Dict[str, Any]) -> str:
-        """Génère le fichier variables.tf"""
-        return '''
-variable "cluster_name" {
-  description = "Name of the Kubernetes cluster"
-  type        = string
-}
-
-variable "environment" {
-  description = "Environment (dev, staging, prod)"
-  type        = string
-}
-
-variable "nodes" {
-  description = "Number of nodes"
-  type        = number
-  default     = 3
-}
-
-variable "kubernetes_version" {
-  description = "Kubernetes version"
-  type        = string
-  default     = "1.28"
-}
-'''
+        return template.substitute(
+            nodes=params.nodes,
+            region=params.region,
+            location=params.location,
+        )
     
-    def _generate_tfvars(self, config: Dict[str, Any]) -> str:
+    @staticmethod
+    def _generate_tfvars(params: _TFParams) -> str:
         """Génère le fichier terraform.tfvars"""
-        nodes = config.get("nodes", 3)
-        environment = config.get("environment", "development")
-        k8s_version = config.get("kubernetes_version", "1.28")
-        
-        return f'''
-cluster_name       = "terraform-agent-cluster"
-environment        = "{environment}"
-nodes              = {nodes}
-kubernetes_version = "{k8s_version}"
-'''
+        return _TFVARS.substitute(
+            nodes=params.nodes,
+            environment=params.environment,
+            kubernetes_version=params.kubernetes_version,
+        )
     
-    def _generate_outputs_tf(self, platform: str, config: Dict[str, Any]) -> str:
+    @staticmethod
+    def _generate_outputs_tf(params: _TFParams) -> str:
         """Génère le fichier outputs.tf"""
-        deployment_mode = config.get("deployment_mode", self.config.deployment_mode.value)
-        
         # Use different resource reference based on mode
-        if deployment_mode == "real":
+        if params.is_real:
             kubeconfig_ref = "data.local_file.kubeconfig.content"
         else:
             kubeconfig_ref = "local_file.kubeconfig.content"
         
-        return f'''
-output "cluster_endpoint" {{
-  description = "Kubernetes cluster endpoint"
-  value       = "https://localhost:6443"
-}}
-
-output "kubeconfig" {{
-  description = "Kubeconfig content"
-  value       = {kubeconfig_ref}
-  sensitive   = true
-}}
-'''
+        return _OUTPUTS_TF.substitute(kubeconfig_ref=kubeconfig_ref)
     
     def _save_kubeconfig(self, workflow_id: str, kubeconfig_content: str) -> str:
         """
@@ -430,17 +806,16 @@ output "kubeconfig" {{
         Returns:
             str: Chemin du fichier kubeconfig
         """
-        import yaml
-        from pathlib import Path
-        import os
-        
-        # 1. Sauvegarder dans output/ (backup)
-        kubeconfig_dir = self.config.output_dir / "kubeconfigs"
-        kubeconfig_dir.mkdir(parents=True, exist_ok=True)
+        # 1. Sauvegarder dans output/ (backup), créé directement en 0600
+        kubeconfig_dir = self.ensure_dir(self.config.output_dir / "kubeconfigs")
         
         kubeconfig_path = kubeconfig_dir / f"{workflow_id}.kubeconfig"
-        kubeconfig_path.write_text(kubeconfig_content)
-        kubeconfig_path.chmod(0o600)
+        fd = os.open(kubeconfig_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # Le mode d'os.open ne s'applique qu'à la création: un backup
+        # existant en 0644 est resserré
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(kubeconfig_content)
         
         # 2. Parser le kubeconfig
         try:
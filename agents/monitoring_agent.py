@@ -2,11 +2,442 @@
 Monitoring Agent
 Agent responsable du déploiement et de la configuration du monitoring (Prometheus/Grafana)
 """
+import hashlib
 import json
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+try:
+    import pygit2
+except ImportError:  # pygit2 est optionnel: repli sur le binaire git
+    pygit2 = None
 
 from core.agent_base import AgentInput, AgentOutput, BaseAgent
+from core.config import DeploymentMode
+from core.fileutils import write_bytes
+from core.k8s_client import get_dynamic_client, server_side_apply
+
+# Émetteur YAML en C (libyaml) si disponible
+try:
+    from yaml import CSafeDumper as YamlDumper
+except ImportError:  # PyYAML compilé sans libyaml
+    from yaml import SafeDumper as YamlDumper
+
+# Server-side apply parallèles du stack de monitoring (reste sous la taille
+# du pool de connexions du client Kubernetes partagé)
+MONITORING_APPLY_WORKERS = 8
+
+# Fichier multi-documents contenant tous les objets du stack, dans l'ordre
+# d'application
+MANIFESTS_FILE = "all.yaml"
+
+# Empreinte des manifests générés dans un répertoire
+MANIFESTS_HASH_FILE = ".manifests_hash"
+
+# Empreintes des objets appliqués avec succès par le déploiement direct
+# (JSON: par empreinte de kubeconfig, empreinte et date d'apply par objet)
+DEPLOYED_HASH_FILE = ".deployed_hashes"
+
+# Âge (secondes) au-delà duquel un objet est réappliqué même inchangé
+# (dérive du cluster: objets modifiés ou supprimés hors de l'agent)
+DEPLOYED_HASH_MAX_AGE = 24 * 3600
+
+# Fichiers (taille, mtime) du dernier commit réussi du repo GitOps, écrit
+# dans .git/ après le commit uniquement
+GITOPS_STAMP_FILE = "kube-agent-manifests"
+
+# Repo GitOps local: identité des commits et commandes de création
+GIT_IDENTITY_ENV = {
+    "GIT_AUTHOR_NAME": "Terraform Agent",
+    "GIT_AUTHOR_EMAIL": "argocd@terraform-agent.local",
+    "GIT_COMMITTER_NAME": "Terraform Agent",
+    "GIT_COMMITTER_EMAIL": "argocd@terraform-agent.local",
+}
+GIT_COMMIT_MESSAGE = "Initial monitoring manifests"
+# (pas de commit si l'index est identique à HEAD: git commit échouerait)
+GIT_COMMIT_SCRIPT = (
+    "git init -q && git add -A && "
+    f"{{ git diff --cached --quiet || git commit -q -m '{GIT_COMMIT_MESSAGE}'; }}"
+)
+
+# Version d'API des Applications ArgoCD
+ARGOCD_APPLICATION_API_VERSION = "argoproj.io/v1alpha1"
+
+# URLs d'accès (Grafana, Prometheus, Headlamp): NodePorts en mode réel,
+# URLs fictives en mode démo
+MONITORING_URLS: Dict[DeploymentMode, Tuple[str, str, str]] = {
+    DeploymentMode.REAL: ("http://localhost:30300", "http://localhost:30090", "http://localhost:30466"),
+    DeploymentMode.DEMO: ("http://localhost:3000", "http://localhost:9090", "http://localhost:4466"),
+}
+
+# Dashboards Grafana importés
+GRAFANA_DASHBOARDS: Tuple[str, ...] = (
+    "Kubernetes Cluster Monitoring",
+    "Node Exporter Full",
+    "Prometheus Stats",
+    "Pod Monitoring",
+    "Namespace Resources",
+)
+
+# Manifests du stack de monitoring: aucun champ ne dépend de la
+# configuration, ils sont sérialisés une seule fois à l'import
+_NAMESPACE_MANIFEST = {
+    "apiVersion": "v1",
+    "kind": "Namespace",
+    "metadata": {"name": "monitoring"}
+}
+
+# Prometheus avec Deployment
+_PROMETHEUS_MANIFESTS: List[Dict[str, Any]] = [
+    # ConfigMap
+    {
+        "apiVersion": "v1",
+        "kind": "ConfigMap",
+        "metadata": {
+            "name": "prometheus-config",
+            "namespace": "monitoring"
+        },
+        "data": {
+            "prometheus.yml": """global:
+  scrape_interval: 15s
+  evaluation_interval: 15s
+
+scrape_configs:
+  - job_name: 'kubernetes-nodes'
+    kubernetes_sd_configs:
+      - role: node
+"""
+        }
+    },
+    # Deployment
+    {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {
+            "name": "prometheus",
+            "namespace": "monitoring"
+        },
+        "spec": {
+            "replicas": 1,
+            "selector": {
+                "matchLabels": {"app": "prometheus"}
+            },
+            "template": {
+                "metadata": {
+                    "labels": {"app": "prometheus"}
+                },
+                "spec": {
+                    "containers": [
+                        {
+                            "name": "prometheus",
+                            "image": "prom/prometheus:latest",
+                            "ports": [{"containerPort": 9090}],
+                            "volumeMounts": [
+                                {
+                                    "name": "config",
+                                    "mountPath": "/etc/prometheus"
+                                }
+                            ]
+                        }
+                    ],
+                    "volumes": [
+                        {
+                            "name": "config",
+                            "configMap": {"name": "prometheus-config"}
+                        }
+                    ]
+                }
+            }
+        }
+    },
+    # Service
+    {
+        "apiVersion": "v1",
+        "kind": "Service",
+        "metadata": {
+            "name": "prometheus",
+            "namespace": "monitoring"
+        },
+        "spec": {
+            "type": "NodePort",
+            "ports": [
+                {
+                    "port": 9090,
+                    "targetPort": 9090,
+                    "nodePort": 30090
+                }
+            ],
+            "selector": {"app": "prometheus"}
+        }
+    }
+]
+
+# Grafana avec Deployment
+_GRAFANA_MANIFESTS: List[Dict[str, Any]] = [
+    # ConfigMap
+    {
+        "apiVersion": "v1",
+        "kind": "ConfigMap",
+        "metadata": {
+            "name": "grafana-datasources",
+            "namespace": "monitoring"
+        },
+        "data": {
+            "datasources.yaml": """apiVersion: 1
+datasources:
+  - name: Prometheus
+    type: prometheus
+    access: proxy
+    url: http://prometheus:9090
+    isDefault: true
+"""
+        }
+    },
+    # Deployment
+    {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {
+            "name": "grafana",
+            "namespace": "monitoring"
+        },
+        "spec": {
+            "replicas": 1,
+            "selector": {
+                "matchLabels": {"app": "grafana"}
+            },
+            "template": {
+                "metadata": {
+                    "labels": {"app": "grafana"}
+                },
+                "spec": {
+                    "containers": [
+                        {
+                            "name": "grafana",
+                            "image": "grafana/grafana:latest",
+                            "ports": [{"containerPort": 3000}],
+                            "env": [
+                                {
+                                    "name": "GF_SECURITY_ADMIN_PASSWORD",
+                                    "value": "admin"
+                                }
+                            ],
+                            "volumeMounts": [
+                                {
+                                    "name": "datasources",
+                                    "mountPath": "/etc/grafana/provisioning/datasources"
+                                }
+                            ]
+                        }
+                    ],
+                    "volumes": [
+                        {
+                            "name": "datasources",
+                            "configMap": {"name": "grafana-datasources"}
+                        }
+                    ]
+                }
+            }
+        }
+    },
+    # Service
+    {
+        "apiVersion": "v1",
+        "kind": "Service",
+        "metadata": {
+            "name": "grafana",
+            "namespace": "monitoring"
+        },
+        "spec": {
+            "type": "NodePort",
+            "ports": [
+                {
+                    "port": 3000,
+                    "targetPort": 3000,
+                    "nodePort": 30300
+                }
+            ],
+            "selector": {"app": "grafana"}
+        }
+    }
+]
+
+# Headlamp (Kubernetes UI)
+_HEADLAMP_MANIFESTS: List[Dict[str, Any]] = [
+    # ServiceAccount
+    {
+        "apiVersion": "v1",
+        "kind": "ServiceAccount",
+        "metadata": {
+            "name": "headlamp",
+            "namespace": "monitoring"
+        }
+    },
+    # ClusterRoleBinding
+    {
+        "apiVersion": "rbac.authorization.k8s.io/v1",
+        "kind": "ClusterRoleBinding",
+        "metadata": {
+            "name": "headlamp"
+        },
+        "roleRef": {
+            "apiGroup": "rbac.authorization.k8s.io",
+            "kind": "ClusterRole",
+            "name": "cluster-admin"
+        },
+        "subjects": [
+            {
+                "kind": "ServiceAccount",
+                "name": "headlamp",
+                "namespace": "monitoring"
+            }
+        ]
+    },
+    # Deployment
+    {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {
+            "name": "headlamp",
+            "namespace": "monitoring"
+        },
+        "spec": {
+            "replicas": 1,
+            "selector": {
+                "matchLabels": {"app": "headlamp"}
+            },
+            "template": {
+                "metadata": {
+                    "labels": {"app": "headlamp"}
+                },
+                "spec": {
+                    "serviceAccountName": "headlamp",
+                    "containers": [
+                        {
+                            "name": "headlamp",
+                            "image": "ghcr.io/headlamp-k8s/headlamp:latest",
+                            "args": ["-in-cluster"],
+                            "ports": [{"containerPort": 4466}],
+                            "env": [
+                                {
+                                    "name": "HEADLAMP_CONFIG_BASE_URL",
+                                    "value": ""
+                                }
+                            ]
+                        }
+                    ]
+                }
+            }
+        }
+    },
+    # Service
+    {
+        "apiVersion": "v1",
+        "kind": "Service",
+        "metadata": {
+            "name": "headlamp",
+            "namespace": "monitoring"
+        },
+        "spec": {
+            "type": "NodePort",
+            "ports": [
+                {
+                    "port": 4466,
+                    "targetPort": 4466,
+                    "nodePort": 30466
+                }
+            ],
+            "selector": {"app": "headlamp"}
+        }
+    }
+]
+
+
+@lru_cache(maxsize=4)
+def _access_instructions(deployment_mode: DeploymentMode, headlamp_enabled: bool) -> str:
+    """Construit le résumé des URLs d'accès au stack de monitoring"""
+    grafana_url, prometheus_url, headlamp_url = MONITORING_URLS[deployment_mode]
+    
+    if deployment_mode is DeploymentMode.REAL:
+        access_parts = [
+            f"Grafana: {grafana_url} (admin/admin)",
+            f"Prometheus: {prometheus_url}"
+        ]
+    else:
+        access_parts = [f"Grafana: {grafana_url}"]
+    if headlamp_enabled:
+        access_parts.append(f"Headlamp: {headlamp_url}")
+    return ", ".join(access_parts)
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """Crée un lien physique, ou copie le fichier si le lien est impossible"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _file_stats(directory: Path) -> Dict[str, Tuple[int, int]]:
+    """Taille et mtime (ns) des fichiers d'un répertoire"""
+    stats = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
+                stat = entry.stat(follow_symlinks=False)
+                stats[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return stats
+
+
+def _commit_with_pygit2(repo_dir: Path) -> None:
+    """
+    Init, add et commit initial du repo GitOps via libgit2 (pygit2)
+    
+    Args:
+        repo_dir: Répertoire du repo
+    """
+    repo = pygit2.init_repository(str(repo_dir))
+    repo.index.add_all()
+    repo.index.write()
+    tree = repo.index.write_tree()
+    signature = pygit2.Signature(
+        GIT_IDENTITY_ENV["GIT_AUTHOR_NAME"], GIT_IDENTITY_ENV["GIT_AUTHOR_EMAIL"]
+    )
+    # Repo existant (manifests régénérés): le commit suit le HEAD courant
+    parents = [] if repo.head_is_unborn else [repo.head.target]
+    if parents and repo.head.peel(pygit2.Commit).tree_id == tree:
+        return
+    repo.create_commit("HEAD", signature, signature, GIT_COMMIT_MESSAGE, tree, parents)
+
+
+def _dump_manifests(manifests: List[Dict[str, Any]]) -> bytes:
+    """
+    Sérialise des objets en flux YAML multi-documents (UTF-8)
+    
+    Chaque document commence par "---": les flux se concatènent tels quels.
+    """
+    return yaml.dump_all(
+        manifests,
+        Dumper=YamlDumper,
+        default_flow_style=False,
+        explicit_start=True,
+        encoding="utf-8",
+    )
+
+
+# Un document par objet (pas de "kind: List" à déplier côté client)
+_NAMESPACE_YAML = _dump_manifests([_NAMESPACE_MANIFEST])
+_PROMETHEUS_YAML = _dump_manifests(_PROMETHEUS_MANIFESTS)
+_GRAFANA_YAML = _dump_manifests(_GRAFANA_MANIFESTS)
+_HEADLAMP_YAML = _dump_manifests(_HEADLAMP_MANIFESTS)
 
 
 class MonitoringAgent(BaseAgent):
@@ -31,7 +462,6 @@ class MonitoringAgent(BaseAgent):
         Returns:
             AgentOutput: Résultat de la configuration
         """
-        logs = []
         errors = []
         
         try:
@@ -46,7 +476,7 @@ class MonitoringAgent(BaseAgent):
                     agent_name=self.agent_name,
                     success=True,
                     data={"summary": "Monitoring disabled"},
-                    logs=logs,
+                    logs=self._captured_logs,
                 )
             
             self.log("Configuring monitoring stack")
@@ -59,80 +489,81 @@ class MonitoringAgent(BaseAgent):
             argocd_output = agent_input.previous_outputs.get("argocd", {})
             use_argocd = argocd_output.get("argocd_installed", False)
             
-            # Générer les manifests Kubernetes
-            manifests_dir = self._generate_monitoring_manifests(
-                agent_input.workflow_id,
-                monitoring_config
-            )
-            logs.append(f"Manifests generated: {manifests_dir}")
-            self.log_success("Monitoring manifests generated")
+            # Générer les manifests Kubernetes (inutilisés par le déploiement
+            # simulé du mode démo)
+            if (
+                self.config.deployment_mode is DeploymentMode.REAL
+                or self.config.generate_manifests_in_demo
+            ):
+                manifests_dir = self._generate_monitoring_manifests(
+                    agent_input.workflow_id,
+                    monitoring_config
+                )
+                self.log_success(f"Monitoring manifests generated: {manifests_dir}")
+            else:
+                manifests_dir = self._manifests_dir(agent_input.workflow_id)
+                self.log("Manifest generation skipped (demo mode)")
             
             # Déploiement via ArgoCD ou direct
             prometheus_deployed = False
             grafana_deployed = False
             
-            if use_argocd and self.config.deployment_mode.value == "real":
+            if use_argocd and self.config.deployment_mode is DeploymentMode.REAL:
                 self.log("🔄 GitOps mode: Deploying via ArgoCD")
                 
-                # Créer un repo Git local pour les manifests
-                repo_path = self._create_git_repo(manifests_dir, agent_input.workflow_id)
-                logs.append(f"Git repo created: {repo_path}")
-                
-                # Créer les Applications ArgoCD
-                argocd_app_created = self._create_argocd_applications(
-                    kubeconfig_path,
-                    repo_path,
-                    agent_input.workflow_id,
-                    monitoring_config
-                )
+                # Créer un repo Git local pour les manifests. Le client est
+                # créé sur ce thread; seul le discovery de la ressource
+                # Application (réseau) se fait en parallèle du repo Git
+                api_client = self._get_client(kubeconfig_path)
+                with ThreadPoolExecutor(max_workers=1) as pool:
+                    application_future = pool.submit(self._application_resource, api_client)
+                    repo_path = self._create_git_repo(manifests_dir, agent_input.workflow_id)
                 
-                if argocd_app_created:
-                    prometheus_deployed = True
-                    grafana_deployed = True
-                    logs.append("ArgoCD Application created")
-                    self.log_success("Monitoring deployed via ArgoCD")
+                if repo_path is None:
+                    # Pas d'Application ArgoCD pointant vers un repo sans commit
+                    errors.append("Failed to create Git repo")
                 else:
-                    errors.append("Failed to create ArgoCD applications")
-                    self.log_error("ArgoCD application creation failed")
+                    # Créer les Applications ArgoCD
+                    with self.step("Monitoring deployment via ArgoCD") as step:
+                        try:
+                            application_resource = application_future.result()
+                        except Exception as e:
+                            self.log_error(f"Failed to resolve ArgoCD Application resource: {e}")
+                        else:
+                            step.ok = self._create_argocd_applications(
+                                application_resource,
+                                repo_path,
+                                agent_input.workflow_id,
+                                monitoring_config
+                            )
+                    prometheus_deployed = step.ok
+                    grafana_deployed = step.ok
+                    
+                    if not step.ok:
+                        errors.append("Failed to create ArgoCD applications")
             else:
                 # Mode direct (sans ArgoCD ou en démo)
                 if not use_argocd:
-                    self.log("📦 Direct mode: Deploying with kubectl")
-                
-                # Déployer Prometheus Operator
-                self.log("Deploying Prometheus Operator...")
-                prometheus_deployed = self._deploy_prometheus_operator(
-                    kubeconfig_path,
-                    manifests_dir
-                )
+                    self.log("📦 Direct mode: Deploying via the Kubernetes API")
                 
-                if prometheus_deployed:
-                    logs.append("Prometheus Operator deployed")
-                    self.log_success("Prometheus Operator deployed")
-                else:
-                    errors.append("Failed to deploy Prometheus Operator")
-                    self.log_error("Prometheus deployment failed")
-                
-                # Déployer Grafana
-                self.log("Deploying Grafana...")
-                grafana_deployed = self._deploy_grafana(
-                    kubeconfig_path,
-                    manifests_dir,
-                    monitoring_config
-                )
+                # Tous les manifests (namespace en premier) sont appliqués
+                # en une passe, sur une seule connexion à l'API
+                with self.step("Prometheus Operator and Grafana deployment") as step:
+                    step.ok = self._deploy_monitoring_stack(
+                        kubeconfig_path,
+                        manifests_dir,
+                        monitoring_config
+                    )
+                prometheus_deployed = step.ok
+                grafana_deployed = step.ok
                 
-                if grafana_deployed:
-                    logs.append("Grafana deployed")
-                    self.log_success("Grafana deployed")
-                else:
-                    errors.append("Failed to deploy Grafana")
-                    self.log_error("Grafana deployment failed")
+                if not step.ok:
+                    errors.append("Failed to deploy monitoring stack")
             
             # Importer les dashboards
             if grafana_deployed:
                 self.log("Importing Grafana dashboards...")
                 dashboards = self._import_dashboards(manifests_dir)
-                logs.append(f"Imported {len(dashboards)} dashboards")
                 self.log_success(f"{len(dashboards)} dashboards imported")
             
             # Configurer les alertes
@@ -144,35 +575,15 @@ class MonitoringAgent(BaseAgent):
                     monitoring_config
                 )
                 if alerts_configured:
-                    logs.append("Alerts configured")
                     self.log_success("Alerts configured")
             
             # URLs d'accès
             headlamp_enabled = monitoring_config.get("headlamp", True)
             
-            if self.config.deployment_mode.value == "real":
-                # En mode réel, utiliser les NodePorts
-                grafana_url = "http://localhost:30300"
-                prometheus_url = "http://localhost:30090"
-                headlamp_url = "http://localhost:30466" if headlamp_enabled else None
-                
-                access_parts = [
-                    f"Grafana: {grafana_url} (admin/admin)",
-                    f"Prometheus: {prometheus_url}"
-                ]
-                if headlamp_enabled:
-                    access_parts.append(f"Headlamp: {headlamp_url}")
-                access_instructions = ", ".join(access_parts)
-            else:
-                # En mode démo, URLs fictives
-                grafana_url = "http://localhost:3000"
-                prometheus_url = "http://localhost:9090"
-                headlamp_url = "http://localhost:4466" if headlamp_enabled else None
-                
-                access_parts = [f"Grafana: {grafana_url}"]
-                if headlamp_enabled:
-                    access_parts.append(f"Headlamp: {headlamp_url}")
-                access_instructions = ", ".join(access_parts)
+            grafana_url, prometheus_url, headlamp_url = MONITORING_URLS[self.config.deployment_mode]
+            if not headlamp_enabled:
+                headlamp_url = None
+            access_instructions = _access_instructions(self.config.deployment_mode, headlamp_enabled)
             
             result_data = {
                 "manifests_dir": str(manifests_dir),
@@ -192,7 +603,7 @@ class MonitoringAgent(BaseAgent):
                 success=len(errors) == 0,
                 data=result_data,
                 errors=errors,
-                logs=logs,
+                logs=self._captured_logs,
             )
             
         except Exception as e:
@@ -204,9 +615,13 @@ class MonitoringAgent(BaseAgent):
                 agent_name=self.agent_name,
                 success=False,
                 errors=errors,
-                logs=logs,
+                logs=self._captured_logs,
             )
     
+    def _manifests_dir(self, workflow_id: str) -> Path:
+        """Répertoire des manifests de monitoring d'un workflow"""
+        return self.config.output_dir / "manifests" / workflow_id / "monitoring"
+    
     def _generate_monitoring_manifests(
         self,
         workflow_id: str,
@@ -222,478 +637,291 @@ class MonitoringAgent(BaseAgent):
         Returns:
             Path: Répertoire des manifests
         """
-        manifests_dir = self.config.output_dir / "manifests" / workflow_id / "monitoring"
-        manifests_dir.mkdir(parents=True, exist_ok=True)
+        manifests_dir = self.ensure_dir(self._manifests_dir(workflow_id))
         
-        # Namespace
-        namespace_manifest = {
-            "apiVersion": "v1",
-            "kind": "Namespace",
-            "metadata": {"name": "monitoring"}
-        }
-        self._save_manifest(manifests_dir / "00-namespace.yaml", namespace_manifest)
+        manifests = self._render_manifests(config)
         
-        # Prometheus
-        prometheus_manifest = self._generate_prometheus_manifest(config)
-        self._save_manifest(manifests_dir / "10-prometheus.yaml", prometheus_manifest)
+        # Manifests identiques à la dernière génération: le fichier sur
+        # disque est déjà à jour (s'il n'a pas été supprimé entre-temps)
+        manifests_hash = hashlib.blake2b(manifests).hexdigest()
+        hash_file = manifests_dir / MANIFESTS_HASH_FILE
+        if (
+            hash_file.exists()
+            and hash_file.read_text() == manifests_hash
+            and (manifests_dir / MANIFESTS_FILE).exists()
+        ):
+            return manifests_dir
         
-        # Grafana
-        grafana_manifest = self._generate_grafana_manifest(config)
-        self._save_manifest(manifests_dir / "20-grafana.yaml", grafana_manifest)
+        hash_file.unlink(missing_ok=True)
         
-        # Headlamp (K8s UI) - optionnel
-        monitoring_config = config.get("monitoring", {})
-        if monitoring_config.get("headlamp", True):  # Activé par défaut
-            headlamp_manifest = self._generate_headlamp_manifest(config)
-            self._save_manifest(manifests_dir / "25-headlamp.yaml", headlamp_manifest)
+        # Fichiers par composant des versions précédentes
+        for stale_file in manifests_dir.glob("*.yaml"):
+            if stale_file.name != MANIFESTS_FILE:
+                stale_file.unlink()
         
-        # ServiceMonitors
-        service_monitors = self._generate_service_monitors()
-        self._save_manifest(manifests_dir / "30-servicemonitors.yaml", service_monitors)
+        # Nouveau fichier puis renommage: les liens physiques vers l'ancien
+        # all.yaml (repo GitOps) ne sont pas modifiés en place
+        tmp_file = manifests_dir / f"{MANIFESTS_FILE}.tmp"
+        write_bytes(tmp_file, manifests)
+        os.replace(tmp_file, manifests_dir / MANIFESTS_FILE)
+        write_bytes(hash_file, manifests_hash.encode())
         
         return manifests_dir
     
-    def _generate_prometheus_manifest(self, config: Dict[str, Any]) -> Dict[str, Any]:
-        """Génère le manifest Prometheus avec Deployment"""
-        retention = config.get("retention", "15d")
+    @staticmethod
+    def _render_manifests(config: Dict[str, Any]) -> bytes:
+        """
+        Assemble le flux YAML multi-documents du stack de monitoring
         
-        return {
-            "apiVersion": "v1",
-            "kind": "List",
-            "items": [
-                # ConfigMap
-                {
-                    "apiVersion": "v1",
-                    "kind": "ConfigMap",
-                    "metadata": {
-                        "name": "prometheus-config",
-                        "namespace": "monitoring"
-                    },
-                    "data": {
-                        "prometheus.yml": f"""global:
-  scrape_interval: 15s
-  evaluation_interval: 15s
-
-scrape_configs:
-  - job_name: 'kubernetes-nodes'
-    kubernetes_sd_configs:
-      - role: node
-"""
-                    }
-                },
-                # Deployment
-                {
-                    "apiVersion": "apps/v1",
-                    "kind": "Deployment",
-                    "metadata": {
-                        "name": "prometheus",
-                        "namespace": "monitoring"
-                    },
-                    "spec": {
-                        "replicas": 1,
-                        "selector": {
-                            "matchLabels": {"app": "prometheus"}
-                        },
-                        "template": {
-                            "metadata": {
-                                "labels": {"app": "prometheus"}
-                            },
-                            "spec": {
-                                "containers": [
-                                    {
-                                        "name": "prometheus",
-                                        "image": "prom/prometheus:latest",
-                                        "ports": [{"containerPort": 9090}],
-                                        "volumeMounts": [
-                                            {
-                                                "name": "config",
-                                                "mountPath": "/etc/prometheus"
-                                            }
-                                        ]
-                                    }
-                                ],
-                                "volumes": [
-                                    {
-                                        "name": "config",
-                                        "configMap": {"name": "prometheus-config"}
-                                    }
-                                ]
-                            }
-                        }
-                    }
-                },
-                # Service
-                {
-                    "apiVersion": "v1",
-                    "kind": "Service",
-                    "metadata": {
-                        "name": "prometheus",
-                        "namespace": "monitoring"
-                    },
-                    "spec": {
-                        "type": "NodePort",
-                        "ports": [
-                            {
-                                "port": 9090,
-                                "targetPort": 9090,
-                                "nodePort": 30090
-                            }
-                        ],
-                        "selector": {"app": "prometheus"}
-                    }
-                }
-            ]
-        }
-    
-    def _generate_grafana_manifest(self, config: Dict[str, Any]) -> Dict[str, Any]:
-        """Génère le manifest Grafana avec Deployment"""
-        return {
-            "apiVersion": "v1",
-            "kind": "List",
-            "items": [
-                # ConfigMap
-                {
-                    "apiVersion": "v1",
-                    "kind": "ConfigMap",
-                    "metadata": {
-                        "name": "grafana-datasources",
-                        "namespace": "monitoring"
-                    },
-                    "data": {
-                        "datasources.yaml": """apiVersion: 1
-datasources:
-  - name: Prometheus
-    type: prometheus
-    access: proxy
-    url: http://prometheus:9090
-    isDefault: true
-"""
-                    }
-                },
-                # Deployment
-                {
-                    "apiVersion": "apps/v1",
-                    "kind": "Deployment",
-                    "metadata": {
-                        "name": "grafana",
-                        "namespace": "monitoring"
-                    },
-                    "spec": {
-                        "replicas": 1,
-                        "selector": {
-                            "matchLabels": {"app": "grafana"}
-                        },
-                        "template": {
-                            "metadata": {
-                                "labels": {"app": "grafana"}
-                            },
-                            "spec": {
-                                "containers": [
-                                    {
-                                        "name": "grafana",
-                                        "image": "grafana/grafana:latest",
-                                        "ports": [{"containerPort": 3000}],
-                                        "env": [
-                                            {
-                                                "name": "GF_SECURITY_ADMIN_PASSWORD",
-                                                "value": "admin"
-                                            }
-                                        ],
-                                        "volumeMounts": [
-                                            {
-                                                "name": "datasources",
-                                                "mountPath": "/etc/grafana/provisioning/datasources"
-                                            }
-                                        ]
-                                    }
-                                ],
-                                "volumes": [
-                                    {
-                                        "name": "datasources",
-                                        "configMap": {"name": "grafana-datasources"}
-                                    }
-                                ]
-                            }
-                        }
-                    }
-                },
-                # Service
-                {
-                    "apiVersion": "v1",
-                    "kind": "Service",
-                    "metadata": {
-                        "name": "grafana",
-                        "namespace": "monitoring"
-                    },
-                    "spec": {
-                        "type": "NodePort",
-                        "ports": [
-                            {
-                                "port": 3000,
-                                "targetPort": 3000,
-                                "nodePort": 30300
-                            }
-                        ],
-                        "selector": {"app": "grafana"}
-                    }
-                }
-            ]
-        }
-    
-    def _generate_headlamp_manifest(self, config: Dict[str, Any]) -> Dict[str, Any]:
-        """Génère le manifest Headlamp (Kubernetes UI)"""
-        return {
-            "apiVersion": "v1",
-            "kind": "List",
-            "items": [
-                # ServiceAccount
-                {
-                    "apiVersion": "v1",
-                    "kind": "ServiceAccount",
-                    "metadata": {
-                        "name": "headlamp",
-                        "namespace": "monitoring"
-                    }
-                },
-                # ClusterRoleBinding
-                {
-                    "apiVersion": "rbac.authorization.k8s.io/v1",
-                    "kind": "ClusterRoleBinding",
-                    "metadata": {
-                        "name": "headlamp"
-                    },
-                    "roleRef": {
-                        "apiGroup": "rbac.authorization.k8s.io",
-                        "kind": "ClusterRole",
-                        "name": "cluster-admin"
-                    },
-                    "subjects": [
-                        {
-                            "kind": "ServiceAccount",
-                            "name": "headlamp",
-                            "namespace": "monitoring"
-                        }
-                    ]
-                },
-                # Deployment
-                {
-                    "apiVersion": "apps/v1",
-                    "kind": "Deployment",
-                    "metadata": {
-                        "name": "headlamp",
-                        "namespace": "monitoring"
-                    },
-                    "spec": {
-                        "replicas": 1,
-                        "selector": {
-                            "matchLabels": {"app": "headlamp"}
-                        },
-                        "template": {
-                            "metadata": {
-                                "labels": {"app": "headlamp"}
-                            },
-                            "spec": {
-                                "serviceAccountName": "headlamp",
-                                "containers": [
-                                    {
-                                        "name": "headlamp",
-                                        "image": "ghcr.io/headlamp-k8s/headlamp:latest",
-                                        "args": ["-in-cluster"],
-                                        "ports": [{"containerPort": 4466}],
-                                        "env": [
-                                            {
-                                                "name": "HEADLAMP_CONFIG_BASE_URL",
-                                                "value": ""
-                                            }
-                                        ]
-                                    }
-                                ]
-                            }
-                        }
-                    }
-                },
-                # Service
-                {
-                    "apiVersion": "v1",
-                    "kind": "Service",
-                    "metadata": {
-                        "name": "headlamp",
-                        "namespace": "monitoring"
-                    },
-                    "spec": {
-                        "type": "NodePort",
-                        "ports": [
-                            {
-                                "port": 4466,
-                                "targetPort": 4466,
-                                "nodePort": 30466
-                            }
-                        ],
-                        "selector": {"app": "headlamp"}
-                    }
-                }
-            ]
-        }
-    
-    def _generate_service_monitors(self) -> Dict[str, Any]:
-        """Génère les ServiceMonitors (optionnel - pour l'instant vide)"""
-        return {
-            "apiVersion": "v1",
-            "kind": "List",
-            "items": []
-        }
-    
-    def _save_manifest(self, path: Path, manifest: Dict[str, Any]) -> None:
-        """Sauvegarde un manifest YAML"""
-        import yaml
-        with open(path, 'w') as f:
-            yaml.dump(manifest, f, default_flow_style=False)
+        Args:
+            config: Configuration du monitoring
+            
+        Returns:
+            bytes: Contenu de all.yaml (namespace en premier)
+        """
+        manifests = [_NAMESPACE_YAML, _PROMETHEUS_YAML, _GRAFANA_YAML]
+        
+        # Headlamp (K8s UI) - optionnel
+        monitoring_config = config.get("monitoring", {})
+        if monitoring_config.get("headlamp", True):  # Activé par défaut
+            manifests.append(_HEADLAMP_YAML)
+        
+        # ServiceMonitors (optionnel - pour l'instant aucun)
+        
+        return b"".join(manifests)
     
-    def _deploy_prometheus_operator(
+    def _deploy_monitoring_stack(
         self,
         kubeconfig_path: str,
-        manifests_dir: Path
+        manifests_dir: Path,
+        config: Dict[str, Any]
     ) -> bool:
         """
-        Déploie Prometheus Operator
+        Déploie Prometheus Operator, Grafana et les autres manifests du stack
+        
+        Les objets des manifests sont appliqués en server-side apply via le
+        client Kubernetes partagé: pas de processus kubectl ni de nouvelle
+        connexion par objet. Le namespace est appliqué en premier, puis les
+        autres objets en parallèle. Les objets identiques à ceux déjà
+        appliqués avec succès sur ce cluster, et toujours présents, ne sont
+        pas réappliqués.
+        
+        Args:
+            kubeconfig_path: Chemin du kubeconfig
+            manifests_dir: Répertoire des manifests (état du dernier déploiement)
+            config: Configuration du monitoring
         
         Returns:
             bool: True si succès
         """
         # Mode démo : simulation rapide
-        if self.config.deployment_mode.value == "demo":
+        if self.config.deployment_mode is DeploymentMode.DEMO:
             self.log("Prometheus Operator deployed (simulated)")
+            self.log("Grafana deployed (simulated)")
             return True
         
-        # Mode réel : vrai déploiement avec kubectl
+        # Mode réel : server-side apply via l'API Kubernetes
         try:
-            import subprocess
-            import os
-            
-            # Prepare environment with kubeconfig
-            env = os.environ.copy()
             if kubeconfig_path:
-                env["KUBECONFIG"] = kubeconfig_path
                 self.log(f"Using kubeconfig: {kubeconfig_path}")
             else:
                 self.log_error("No kubeconfig provided, using default")
             
-            # Créér le namespace monitoring
-            namespace_yaml = """apiVersion: v1
-kind: Namespace
-metadata:
-  name: monitoring
-"""
-            result = subprocess.run(
-                ["kubectl", "apply", "-f", "-"],
-                input=namespace_yaml.encode(),
-                capture_output=True,
-                env=env
-            )
-            if result.returncode != 0:
-                self.log_error(f"Failed to create namespace: {result.stderr.decode()}")
-                return False
+            api_client = self._get_client(kubeconfig_path)
             
-            # Déployer avec kube-prometheus-stack (Helm recommandé en prod)
-            self.log("📦 Deploying Prometheus from manifests...")
-            result = subprocess.run(
-                [
-                    "kubectl", "apply", "-f",
-                    str(manifests_dir)
-                ],
-                capture_output=True,
-                timeout=60,
-                env=env
-            )
+            # Seuls les objets modifiés depuis le dernier déploiement réussi
+            # sur ce cluster (ou appliqués il y a plus de
+            # DEPLOYED_HASH_MAX_AGE) sont réappliqués; force_monitoring_apply
+            # réapplique tout le stack
+            deployed_file = manifests_dir / DEPLOYED_HASH_FILE
+            kubeconfig_hash = hashlib.blake2b(Path(self._k8s_kubeconfig).read_bytes()).hexdigest()
+            if self.config.force_monitoring_apply:
+                deployed = {}
+            else:
+                deployed = self._load_deployed_hashes(deployed_file, kubeconfig_hash)
             
-            if result.returncode != 0:
-                self.log_error(f"Prometheus operator failed: {result.stderr.decode()}")
-                return False
+            # Discovery partagé avec les autres agents (fait une seule fois
+            # par cluster); résolution des ressources avant de paralléliser
+            dyn_client = get_dynamic_client(api_client)
+            
+            changed = []
+            unchanged = []
+            object_hashes = {}
+            for manifest in self._manifest_objects(config):
+                key = self._object_key(manifest)
+                object_hashes[key] = hashlib.blake2b(
+                    json.dumps(manifest, sort_keys=True).encode("utf-8")
+                ).hexdigest()
+                resource = dyn_client.resources.get(
+                    api_version=manifest["apiVersion"], kind=manifest["kind"]
+                )
+                if deployed.get(key, {}).get("hash") != object_hashes[key]:
+                    changed.append((resource, manifest))
+                else:
+                    unchanged.append((resource, manifest))
+            
+            # Un objet inchangé n'est ignoré que s'il existe encore sur le
+            # cluster (GET): un objet supprimé hors de l'agent est réappliqué
+            if unchanged:
+                with ThreadPoolExecutor(max_workers=MONITORING_APPLY_WORKERS) as pool:
+                    present = list(pool.map(lambda item: self._object_exists(*item), unchanged))
+                changed.extend(item for item, exists in zip(unchanged, present) if not exists)
+            
+            if not changed:
+                self.log("Monitoring manifests unchanged since last deploy, apply skipped")
+                return True
+            
+            self.log(f"📦 Deploying monitoring stack ({len(changed)}/{len(object_hashes)} objects changed)...")
+            
+            namespaces = []
+            others = []
+            for resource, manifest in changed:
+                batch = namespaces if manifest["kind"] == "Namespace" else others
+                batch.append((resource, manifest))
+            
+            # Le namespace d'abord; les autres objets ne dépendent pas de leur
+            # ordre de création et sont appliqués en parallèle
+            applied = []
+            errors = []
+            for batch in (namespaces, others):
+                with ThreadPoolExecutor(max_workers=MONITORING_APPLY_WORKERS) as pool:
+                    results = list(pool.map(lambda item: server_side_apply(*item), batch))
+                
+                for (_, manifest), error in zip(batch, results):
+                    if error:
+                        errors.append(error)
+                    else:
+                        key = self._object_key(manifest)
+                        deployed[key] = {"hash": object_hashes[key], "applied_at": time.time()}
+                        applied.append(f"{manifest['kind']}/{manifest['metadata']['name']}")
+                if errors:
+                    break
+            
+            # Les objets appliqués sont enregistrés même en cas d'échec
+            # partiel: le prochain essai ne reprend que les autres
+            self._save_deployed_hashes(deployed_file, kubeconfig_hash, deployed)
             
             # Log successful deployments
-            stdout = result.stdout.decode()
-            if stdout:
+            if applied:
                 self.log("✅ Deployed resources:")
-                for line in stdout.strip().split('\n'):
-                    if line.strip():
-                        self.log(f"  {line}")
+                for name in applied:
+                    self.log(f"  {name} serverside-applied")
             
-            self.log("Prometheus Operator deployed (real)")
+            if errors:
+                for error in errors:
+                    self.log_error(f"Monitoring stack deployment failed: {error}")
+                return False
+            
+            self.log("Prometheus Operator and Grafana deployed (real)")
             return True
             
         except Exception as e:
-            self.log_error(f"Failed to deploy Prometheus: {e}")
+            self.log_error(f"Failed to deploy monitoring stack: {e}")
             return False
     
-    def _deploy_grafana(
-        self,
-        kubeconfig_path: str,
-        manifests_dir: Path,
-        config: Dict[str, Any]
-    ) -> bool:
+    @staticmethod
+    def _object_exists(resource: Any, manifest: Dict[str, Any]) -> bool:
         """
-        Déploie Grafana
+        Vérifie qu'un objet existe encore sur le cluster
         
         Returns:
-            bool: True si succès
+            bool: False si l'objet est absent ou si la lecture échoue (il sera
+                réappliqué)
         """
-        # Mode démo : simulation rapide
-        if self.config.deployment_mode.value == "demo":
-            self.log("Grafana deployed (simulated)")
+        metadata = manifest["metadata"]
+        try:
+            resource.get(name=metadata["name"], namespace=metadata.get("namespace"))
             return True
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _object_key(manifest: Dict[str, Any]) -> str:
+        """Identifiant d'un objet Kubernetes (apiVersion/kind/namespace/nom)"""
+        metadata = manifest["metadata"]
+        return "/".join((
+            manifest["apiVersion"],
+            manifest["kind"],
+            metadata.get("namespace", ""),
+            metadata["name"],
+        ))
+    
+    @staticmethod
+    def _load_deployed_hashes(deployed_file: Path, kubeconfig_hash: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Charge les empreintes des objets déjà appliqués sur ce cluster
         
-        # Mode réel : vrai déploiement
+        Args:
+            deployed_file: Fichier des empreintes (DEPLOYED_HASH_FILE)
+            kubeconfig_hash: Empreinte du kubeconfig (identifie le cluster)
+        
+        Returns:
+            Dict: Identifiant d'objet -> {"hash", "applied_at"} (sans les
+                objets appliqués il y a plus de DEPLOYED_HASH_MAX_AGE)
+        """
         try:
-            import subprocess
-            import os
-            
-            # Prepare environment with kubeconfig
-            env = os.environ.copy()
-            if kubeconfig_path:
-                env["KUBECONFIG"] = kubeconfig_path
-            
-            self.log("📊 Deploying Grafana...")
-            result = subprocess.run(
-                [
-                    "kubectl", "apply", "-f",
-                    str(manifests_dir / "20-grafana.yaml")
-                ],
-                capture_output=True,
-                timeout=60,
-                env=env
-            )
-            
-            if result.returncode != 0:
-                self.log_error(f"Grafana deployment failed: {result.stderr.decode()}")
-                return False
-            
-            # Log successful deployment
-            stdout = result.stdout.decode()
-            if stdout:
-                self.log(f"✅ {stdout.strip()}")
-            
-            self.log("Grafana deployed (real)")
-            return True
+            record = json.loads(deployed_file.read_bytes())
+        except (OSError, ValueError):
+            return {}
+        objects = record.get(kubeconfig_hash) if isinstance(record, dict) else None
+        if not isinstance(objects, dict):
+            return {}
+        
+        oldest = time.time() - DEPLOYED_HASH_MAX_AGE
+        return {
+            key: entry for key, entry in objects.items()
+            if isinstance(entry, dict) and entry.get("applied_at", 0) >= oldest
+        }
+    
+    @staticmethod
+    def _save_deployed_hashes(
+        deployed_file: Path,
+        kubeconfig_hash: str,
+        objects: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """Enregistre les empreintes des objets appliqués sur ce cluster (remplacement atomique)"""
+        try:
+            record = json.loads(deployed_file.read_bytes())
+        except (OSError, ValueError):
+            record = {}
+        if not isinstance(record, dict):
+            record = {}
+        record[kubeconfig_hash] = objects
+        
+        tmp_file = deployed_file.with_name(deployed_file.name + ".tmp")
+        tmp_file.write_text(json.dumps(record))
+        os.replace(tmp_file, deployed_file)
+    
+    @staticmethod
+    def _manifest_objects(config: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Parcourt les objets du stack, dans l'ordre de all.yaml
+        
+        Les objets viennent directement des manifests en mémoire: le
+        déploiement ne relit ni ne re-parse all.yaml.
+        
+        Args:
+            config: Configuration du monitoring
             
-        except Exception as e:
-            self.log_error(f"Failed to deploy Grafana: {e}")
-            return False
+        Yields:
+            Dict: Objet Kubernetes à appliquer
+        """
+        yield _NAMESPACE_MANIFEST
+        yield from _PROMETHEUS_MANIFESTS
+        yield from _GRAFANA_MANIFESTS
+        
+        monitoring_config = config.get("monitoring", {})
+        if monitoring_config.get("headlamp", True):
+            yield from _HEADLAMP_MANIFESTS
     
-    def _import_dashboards(self, manifests_dir: Path) -> List[str]:
+    def _import_dashboards(self, manifests_dir: Path) -> Tuple[str, ...]:
         """
         Importe les dashboards Grafana
         
         Returns:
-            List[str]: Liste des dashboards importés
+            Tuple[str, ...]: Dashboards importés
         """
-        dashboards = [
-            "Kubernetes Cluster Monitoring",
-            "Node Exporter Full",
-            "Prometheus Stats",
-            "Pod Monitoring",
-            "Namespace Resources",
-        ]
-        return dashboards
+        return GRAFANA_DASHBOARDS
     
     def _configure_alerts(
         self,
@@ -711,7 +939,7 @@ metadata:
         self.log("Alerts configured (simulated)")
         return True
     
-    def _create_git_repo(self, manifests_dir: Path, workflow_id: str) -> Path:
+    def _create_git_repo(self, manifests_dir: Path, workflow_id: str) -> Optional[Path]:
         """
         Crée un repo Git local pour les manifests (GitOps)
         
@@ -720,73 +948,83 @@ metadata:
             workflow_id: ID du workflow
             
         Returns:
-            Path: Chemin du repo Git créé
+            Optional[Path]: Chemin du repo Git créé, None si le commit a échoué
         """
         try:
-            import subprocess
-            
             # Créer un répertoire pour le repo bare
             repo_dir = self.config.output_dir / "gitops" / workflow_id
             repo_dir.mkdir(parents=True, exist_ok=True)
             
-            # Initialiser un repo Git
-            subprocess.run(
-                ["git", "init"],
-                cwd=repo_dir,
-                capture_output=True,
-                timeout=10
-            )
-            
-            # Copier les manifests dans le repo
-            import shutil
+            # Repo déjà à jour: les liens physiques et copy2 conservent le
+            # mtime, un manifest régénéré (nouveau fichier) ne correspond plus.
+            # Le tampon n'existe qu'après un commit réussi de ces fichiers
             monitoring_path = repo_dir / "monitoring"
+            stamp_file = repo_dir / ".git" / GITOPS_STAMP_FILE
+            manifests_stamp = json.dumps(_file_stats(manifests_dir), sort_keys=True)
+            try:
+                if stamp_file.read_text() == manifests_stamp:
+                    self.log(f"Git repo up to date: {repo_dir}")
+                    return repo_dir
+            except FileNotFoundError:
+                pass
+            
+            stamp_file.unlink(missing_ok=True)
             if monitoring_path.exists():
                 shutil.rmtree(monitoring_path)
-            shutil.copytree(manifests_dir, monitoring_path)
+            
+            # Copier les manifests dans le repo
+            # Liens physiques plutôt que copies (repli sur copy2 entre
+            # systèmes de fichiers différents)
+            shutil.copytree(manifests_dir, monitoring_path, copy_function=_link_or_copy)
             
             # Créer un .gitignore
             gitignore_path = repo_dir / ".gitignore"
-            gitignore_path.write_text("*.swp\n*.tmp\n")
-            
-            # Commit initial
-            subprocess.run(
-                ["git", "add", "-A"],
-                cwd=repo_dir,
-                capture_output=True,
-                timeout=10
-            )
+            gitignore_path.write_text(f"*.swp\n*.tmp\n{MANIFESTS_HASH_FILE}\n{DEPLOYED_HASH_FILE}\n")
             
-            subprocess.run(
-                ["git", "config", "user.email", "argocd@terraform-agent.local"],
-                cwd=repo_dir,
-                capture_output=True,
-                timeout=10
-            )
-            
-            subprocess.run(
-                ["git", "config", "user.name", "Terraform Agent"],
-                cwd=repo_dir,
-                capture_output=True,
-                timeout=10
-            )
-            
-            subprocess.run(
-                ["git", "commit", "-m", "Initial monitoring manifests"],
-                cwd=repo_dir,
-                capture_output=True,
-                timeout=10
-            )
+            if pygit2 is not None:
+                # libgit2 en processus: pas de fork de git
+                _commit_with_pygit2(repo_dir)
+            else:
+                # Init, add et commit en un seul processus; l'identité du
+                # commit passe par l'environnement (pas de git config)
+                result = subprocess.run(
+                    ["sh", "-c", GIT_COMMIT_SCRIPT],
+                    cwd=repo_dir,
+                    env={**os.environ, **GIT_IDENTITY_ENV},
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    timeout=30
+                )
+                if result.returncode != 0:
+                    self.log_error(f"Failed to create Git repo: {result.stderr.strip()}")
+                    return None
             
+            write_bytes(stamp_file, manifests_stamp.encode())
             self.log(f"Git repo created: {repo_dir}")
             return repo_dir
             
         except Exception as e:
             self.log_error(f"Failed to create Git repo: {e}")
-            return manifests_dir
+            return None
+    
+    @staticmethod
+    def _application_resource(api_client: Any) -> Any:
+        """
+        Résout la ressource Application d'ArgoCD (discovery mis en cache)
+        
+        Args:
+            api_client: Client Kubernetes (obtenu via _get_client)
+            
+        Returns:
+            Resource: Ressource argoproj.io/v1alpha1 Application
+        """
+        dyn_client = get_dynamic_client(api_client)
+        return dyn_client.resources.get(api_version=ARGOCD_APPLICATION_API_VERSION, kind="Application")
     
     def _create_argocd_applications(
         self,
-        kubeconfig_path: str,
+        application_resource: Any,
         repo_path: Path,
         workflow_id: str,
         monitoring_config: Dict[str, Any]
@@ -795,7 +1033,8 @@ metadata:
         Crée les Applications ArgoCD pour le monitoring stack
         
         Args:
-            kubeconfig_path: Chemin vers kubeconfig
+            application_resource: Ressource Application résolue
+                (_application_resource)
             repo_path: Chemin vers le repo Git local
             workflow_id: ID du workflow
             monitoring_config: Configuration du monitoring
@@ -804,16 +1043,9 @@ metadata:
             bool: True si succès
         """
         try:
-            import subprocess
-            import os
-            import yaml
-            
-            env = os.environ.copy()
-            env["KUBECONFIG"] = kubeconfig_path
-            
             # Application pour le monitoring stack
             monitoring_app = {
-                "apiVersion": "argoproj.io/v1alpha1",
+                "apiVersion": ARGOCD_APPLICATION_API_VERSION,
                 "kind": "Application",
                 "metadata": {
                     "name": f"monitoring-{workflow_id}",
@@ -845,22 +1077,14 @@ metadata:
             
             # Sauvegarder l'Application
             app_file = self.config.output_dir / "argocd-apps" / workflow_id / "monitoring-app.yaml"
-            app_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(app_file, 'w') as f:
-                yaml.dump(monitoring_app, f)
+            self.ensure_dir(app_file.parent)
+            write_bytes(app_file, yaml.dump(monitoring_app, Dumper=YamlDumper, encoding="utf-8"))
             
             # Appliquer l'Application dans ArgoCD
-            result = subprocess.run(
-                ["kubectl", "apply", "-f", str(app_file)],
-                capture_output=True,
-                text=True,
-                env=env,
-                timeout=10
-            )
+            error = server_side_apply(application_resource, monitoring_app)
             
-            if result.returncode != 0:
-                self.log_error(f"Failed to create ArgoCD application: {result.stderr}")
+            if error:
+                self.log_error(f"Failed to create ArgoCD application: {error}")
                 return False
             
             self.log_success("ArgoCD Application created for monitoring")
@@ -2,9 +2,14 @@
 Validation Agent
 Agent responsable de la validation du cluster et de sa santé
 """
+import json
 from typing import Any, Dict, List
 
 from core.agent_base import AgentInput, AgentOutput, BaseAgent
+from core.config import DeploymentMode
+
+# Timeout (secondes) des appels de validation à l'API Kubernetes
+API_REQUEST_TIMEOUT = 10
 
 
 class ValidationAgent(BaseAgent):
@@ -65,7 +70,7 @@ class ValidationAgent(BaseAgent):
             self.log("Checking system pods...")
             
             # En mode réel, retry plusieurs fois pour laisser les pods démarrer
-            if self.config.deployment_mode.value == "real":
+            if self.config.deployment_mode is DeploymentMode.REAL:
                 max_retries = 6
                 retry_delay = 10
                 for attempt in range(max_retries):
@@ -224,7 +229,7 @@ class ValidationAgent(BaseAgent):
             Dict: Statut des nœuds
         """
         # Mode démo : données simulées
-        if self.config.deployment_mode.value == "demo":
+        if self.config.deployment_mode is DeploymentMode.DEMO:
             return {
                 "total": 3,
                 "ready": 3,
@@ -236,36 +241,28 @@ class ValidationAgent(BaseAgent):
                 ]
             }
         
-        # Mode réel : vraies vérifications avec kubectl
+        # Mode réel : vraies vérifications via l'API Kubernetes
         try:
-            import subprocess
-            import json
-            import os
-            
-            # Prepare environment with kubeconfig
-            env = os.environ.copy()
-            if kubeconfig_path:
-                env["KUBECONFIG"] = kubeconfig_path
-            
-            result = subprocess.run(
-                ["kubectl", "get", "nodes", "-o", "json"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                env=env
-            )
-            
-            if result.returncode != 0:
-                self.log_error(f"kubectl get nodes failed: {result.stderr}")
+            from kubernetes import client
+            from kubernetes.client.rest import ApiException
+            
+            # Réponse brute (_preload_content=False): même JSON que
+            # kubectl get -o json, sans désérialisation en objets du client
+            try:
+                response = client.CoreV1Api(self._get_client(kubeconfig_path)).list_node(
+                    _preload_content=False, _request_timeout=API_REQUEST_TIMEOUT
+                )
+            except ApiException as e:
+                self.log_error(f"Listing nodes failed: {e.reason}")
                 return {
                     "total": 0,
                     "ready": 0,
                     "not_ready": 0,
                     "nodes": [],
-                    "error": result.stderr
+                    "error": e.reason
                 }
             
-            nodes_data = json.loads(result.stdout)
+            nodes_data = json.loads(response.data)
             nodes = []
             ready_count = 0
             
@@ -312,7 +309,7 @@ class ValidationAgent(BaseAgent):
             Dict: Statut des pods
         """
         # Mode démo : simulation
-        if self.config.deployment_mode.value == "demo":
+        if self.config.deployment_mode is DeploymentMode.DEMO:
             return {
                 "total": 12,
                 "running": 12,
@@ -326,35 +323,27 @@ class ValidationAgent(BaseAgent):
         
         # Mode réel : vraies vérifications
         try:
-            import subprocess
-            import json
-            import os
-            
-            # Prepare environment with kubeconfig
-            env = os.environ.copy()
-            if kubeconfig_path:
-                env["KUBECONFIG"] = kubeconfig_path
-            
-            result = subprocess.run(
-                ["kubectl", "get", "pods", "--all-namespaces", "-o", "json"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                env=env
-            )
-            
-            if result.returncode != 0:
-                self.log_error(f"kubectl get pods failed: {result.stderr}")
+            from kubernetes import client
+            from kubernetes.client.rest import ApiException
+            
+            try:
+                response = client.CoreV1Api(
+                    self._get_client(kubeconfig_path)
+                ).list_pod_for_all_namespaces(
+                    _preload_content=False, _request_timeout=API_REQUEST_TIMEOUT
+                )
+            except ApiException as e:
+                self.log_error(f"Listing pods failed: {e.reason}")
                 return {
                     "total": 0,
                     "running": 0,
                     "pending": 0,
                     "failed": 0,
                     "namespaces": {},
-                    "error": result.stderr
+                    "error": e.reason
                 }
             
-            pods_data = json.loads(result.stdout)
+            pods_data = json.loads(response.data)
             running = 0
             pending = 0
             failed = 0
@@ -448,7 +437,7 @@ class ValidationAgent(BaseAgent):
             Dict: Statut ArgoCD
         """
         # Mode démo
-        if self.config.deployment_mode.value == "demo":
+        if self.config.deployment_mode is DeploymentMode.DEMO:
             return {
                 "healthy": True,
                 "status": "healthy",
@@ -461,54 +450,46 @@ class ValidationAgent(BaseAgent):
         
         # Mode réel
         try:
-            import subprocess
-            import json
-            import os
-            
-            env = os.environ.copy()
-            if kubeconfig_path:
-                env["KUBECONFIG"] = kubeconfig_path
-            
-            # Vérifier les pods ArgoCD
-            result = subprocess.run(
-                ["kubectl", "get", "pods", "-n", "argocd", "-o", "json"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                env=env
-            )
+            from kubernetes import client
+            from kubernetes.client.rest import ApiException
             
-            if result.returncode != 0:
+            api_client = self._get_client(kubeconfig_path)
+            
+            # Vérifier les pods ArgoCD: seule la phase est utile
+            try:
+                response = client.CoreV1Api(api_client).list_namespaced_pod(
+                    "argocd", _preload_content=False, _request_timeout=API_REQUEST_TIMEOUT
+                )
+            except ApiException as e:
                 return {
                     "healthy": False,
                     "status": "unavailable",
-                    "error": result.stderr
+                    "error": e.reason
                 }
             
-            pods_data = json.loads(result.stdout)
-            total_pods = len(pods_data.get("items", []))
-            running_pods = sum(
-                1 for pod in pods_data.get("items", [])
-                if pod["status"].get("phase") == "Running"
-            )
+            phases = [
+                pod.get("status", {}).get("phase")
+                for pod in json.loads(response.data).get("items", [])
+            ]
+            total_pods = len(phases)
+            running_pods = phases.count("Running")
             
             # Vérifier les Applications ArgoCD
-            app_result = subprocess.run(
-                ["kubectl", "get", "applications", "-n", "argocd", "-o", "json"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                env=env
-            )
-            
             applications = {
                 "total": 0,
                 "synced": 0,
                 "healthy": 0
             }
             
-            if app_result.returncode == 0:
-                apps_data = json.loads(app_result.stdout)
+            try:
+                apps_data = client.CustomObjectsApi(api_client).list_namespaced_custom_object(
+                    "argoproj.io", "v1alpha1", "argocd", "applications",
+                    _request_timeout=API_REQUEST_TIMEOUT,
+                )
+            except ApiException:
+                apps_data = None
+            
+            if apps_data is not None:
                 applications["total"] = len(apps_data.get("items", []))
                 
                 for app in apps_data.get("items", []):
@@ -2,15 +2,19 @@
 Agent Base Module
 Classe de base abstraite pour tous les agents
 """
+import time
 import uuid
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
 
 from pydantic import BaseModel, Field
 from rich.console import Console
 
 from core.config import Config
+from core.k8s_client import get_api_client, release_api_client
 from core.llm_provider import LLMProviderFactory
 from core.state_manager import (
     AgentExecution,
@@ -19,6 +23,9 @@ from core.state_manager import (
     WorkflowState,
 )
 
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseLLM
+
 console = Console()
 
 
@@ -39,6 +46,13 @@ class AgentOutput(BaseModel):
     execution_time: float = 0.0
 
 
+class StepResult:
+    """Résultat d'une étape suivie par BaseAgent.step()"""
+    
+    def __init__(self) -> None:
+        self.ok = False
+
+
 class BaseAgent(ABC):
     """
     Classe de base abstraite pour tous les agents du système
@@ -51,13 +65,18 @@ class BaseAgent(ABC):
         self,
         config: Config,
         state_manager: StateManager,
-        llm: Optional[BaseLLM] = None,
+        llm: Optional["BaseLLM"] = None,
     ):
         self.config = config
         self.state_manager = state_manager
         self.llm = llm or LLMProviderFactory.get_llm(config)
         self.agent_name = self.__class__.__name__
         self.console = console
+        # Messages loggés pendant le run courant (réinitialisés par run())
+        self._captured_logs: List[str] = []
+        # Client Kubernetes partagé par tous les appels d'une exécution
+        self._k8s: Optional[Any] = None
+        self._k8s_kubeconfig: Optional[str] = None
     
     @abstractmethod
     def execute(self, agent_input: AgentInput) -> AgentOutput:
@@ -84,6 +103,7 @@ class BaseAgent(ABC):
         """
         execution_id = str(uuid.uuid4())
         start_time = datetime.utcnow()
+        self._captured_logs = []
         
         # Log début
         self._log_start(execution_id, agent_input.workflow_id)
@@ -141,6 +161,48 @@ class BaseAgent(ABC):
                 errors=[error_msg],
                 execution_time=(end_time - start_time).total_seconds(),
             )
+        
+        finally:
+            self.teardown()
+    
+    def teardown(self) -> None:
+        """
+        Libère les ressources ouvertes pendant execute()
+        
+        Appelé à la fin de chaque run(): le client Kubernetes obtenu via
+        _get_client() est rendu au pool partagé.
+        """
+        if self._k8s is not None:
+            release_api_client(self._k8s)
+            self._k8s = None
+            self._k8s_kubeconfig = None
+    
+    def _get_client(self, kubeconfig_path: Optional[str]) -> Any:
+        """
+        Retourne le ApiClient Kubernetes pour ce kubeconfig
+        
+        Le client vient du pool partagé (core.k8s_client): tous les appels à
+        l'API d'une exécution, et les workflows sur le même cluster,
+        réutilisent la même connexion HTTPS (keep-alive).
+        
+        Args:
+            kubeconfig_path: Chemin du kubeconfig (None: kubeconfig par défaut)
+            
+        Returns:
+            ApiClient: Client réutilisé jusqu'au teardown()
+        """
+        if not kubeconfig_path:
+            from kubernetes.config.kube_config import KUBE_CONFIG_DEFAULT_LOCATION
+            
+            kubeconfig_path = str(Path(KUBE_CONFIG_DEFAULT_LOCATION).expanduser())
+        
+        if self._k8s is not None and self._k8s_kubeconfig == kubeconfig_path:
+            return self._k8s
+        
+        self.teardown()
+        self._k8s = get_api_client(kubeconfig_path)
+        self._k8s_kubeconfig = kubeconfig_path
+        return self._k8s
     
     def _log_start(self, execution_id: str, workflow_id: str) -> None:
         """Log le démarrage de l'agent"""
@@ -171,31 +233,93 @@ class BaseAgent(ABC):
             f"  [red]{error}[/red]"
         )
     
+    def workflow_output_dir(self, workflow_id: str) -> Path:
+        """
+        Retourne le répertoire de sortie d'un workflow (créé si besoin)
+        
+        Args:
+            workflow_id: ID du workflow
+            
+        Returns:
+            Path: <output_dir>/<workflow_id>
+        """
+        return self.ensure_dir(self.config.output_dir / workflow_id)
+    
+    def ensure_dir(self, path: Path) -> Path:
+        """
+        Crée un répertoire (et ses parents) s'il n'existe pas
+        
+        Pas de mémorisation: mkdir(exist_ok=True) ne coûte qu'un appel
+        système, et un répertoire supprimé entre-temps est recréé.
+        
+        Args:
+            path: Répertoire à créer
+            
+        Returns:
+            Path: Le même répertoire
+        """
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+    
     def log(self, message: str, style: str = "dim") -> None:
         """
         Log un message avec style
         
+        Tous les messages loggés pendant un run sont aussi conservés dans
+        self._captured_logs, que execute() peut retourner dans AgentOutput.logs.
+        
         Args:
             message: Message à logger
             style: Style Rich (ex: 'bold', 'dim', 'red', etc.)
         """
         self.console.print(f"  [{style}]{message}[/{style}]")
+        self._captured_logs.append(message)
     
     def log_success(self, message: str) -> None:
         """Log un message de succès"""
         self.console.print(f"  [green]✓ {message}[/green]")
+        self._captured_logs.append(message)
     
     def log_error(self, message: str) -> None:
         """Log un message d'erreur"""
         self.console.print(f"  [red]✗ {message}[/red]")
+        self._captured_logs.append(message)
     
     def log_warning(self, message: str) -> None:
         """Log un avertissement"""
         self.console.print(f"  [yellow]⚠ {message}[/yellow]")
+        self._captured_logs.append(message)
     
     def log_info(self, message: str) -> None:
         """Log une information"""
         self.console.print(f"  [blue]ℹ {message}[/blue]")
+        self._captured_logs.append(message)
+    
+    @contextmanager
+    def step(self, name: str) -> Iterator[StepResult]:
+        """
+        Chronomètre une étape et la logge en un seul message
+        
+        Le bloc positionne step.ok; à la sortie, un seul message
+        "<name>: ok in 1.2s" (ou "failed after ...") est loggé (et donc
+        conservé dans self._captured_logs).
+        
+        Args:
+            name: Nom de l'étape
+            
+        Yields:
+            StepResult: Résultat à renseigner par le bloc
+        """
+        result = StepResult()
+        start = time.monotonic()
+        try:
+            yield result
+        finally:
+            elapsed = time.monotonic() - start
+            if result.ok:
+                self.log_success(f"{name}: ok in {elapsed:.1f}s")
+            else:
+                self.log_error(f"{name}: failed after {elapsed:.1f}s")
     
     def prompt_llm(self, prompt: str) -> str:
         """
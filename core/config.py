@@ -93,6 +93,12 @@ class Config(BaseSettings):
     # Monitoring
     prometheus_retention: str = Field(default="15d", env="PROMETHEUS_RETENTION")
     grafana_admin_password: str = Field(default="admin", env="GRAFANA_ADMIN_PASSWORD")
+    # En mode démo, les manifests ne sont pas déployés: ne les générer que
+    # si on veut les inspecter
+    generate_manifests_in_demo: bool = Field(default=False, env="GENERATE_MANIFESTS_IN_DEMO")
+    # Réappliquer tout le stack même si les objets n'ont pas changé depuis
+    # le dernier déploiement (modifications faites directement sur le cluster)
+    force_monitoring_apply: bool = Field(default=False, env="FORCE_MONITORING_APPLY")
     
     # Alerting
     slack_webhook_url: Optional[str] = Field(default=None, env="SLACK_WEBHOOK_URL")
@@ -0,0 +1,53 @@
+"""
+File Utilities Module
+Empreintes et écritures de fichiers partagées entre les agents
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel: repli sur json
+    orjson = None
+
+
+def data_fingerprint(data: Any) -> str:
+    """
+    Calcule l'empreinte stable de données sérialisables en JSON
+    
+    Args:
+        data: Données à hacher (clés triées, valeurs non JSON converties en str)
+    
+    Returns:
+        str: Empreinte blake2b hexadécimale
+    """
+    if orjson is not None:
+        payload = orjson.dumps(
+            data,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+            default=str,
+        )
+    else:
+        payload = json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(payload).hexdigest()
+
+
+def write_bytes(path: Union[str, Path], data: bytes, dir_fd: Optional[int] = None) -> None:
+    """
+    Écrit un fichier en écritures os.write directes (sans buffer Python)
+    
+    Args:
+        path: Chemin du fichier (relatif à dir_fd si fourni)
+        data: Contenu déjà encodé
+        dir_fd: Descripteur du répertoire parent (os.open avec dir_fd)
+    """
+    view = memoryview(data)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644, dir_fd=dir_fd)
+    try:
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
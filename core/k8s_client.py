@@ -0,0 +1,227 @@
+"""
+Kubernetes Client Module
+Pool de clients Kubernetes partagé entre les agents et les workflows
+"""
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# Field manager de tous les server-side apply effectués par les agents
+FIELD_MANAGER = "kube-agent"
+
+# Durée (secondes) après laquelle un client inutilisé est fermé
+CLIENT_IDLE_TIMEOUT = 300
+
+# Nombre maximum de clients conservés dans le pool
+CLIENT_POOL_MAX_SIZE = 8
+
+# Connexions HTTP keep-alive conservées par client: couvre les appels
+# parallèles d'un agent (8 server-side apply + watches) sans en rouvrir
+CLIENT_CONNECTION_POOL_MAXSIZE = 10
+
+# Retries sur erreurs de connexion (backoff: 0.3s, 0.6s, 1.2s)
+CLIENT_RETRIES = 3
+CLIENT_RETRY_BACKOFF = 0.3
+
+
+@dataclass
+class _PooledClient:
+    """Entrée du pool: un ApiClient, son DynamicClient et son compteur d'utilisateurs"""
+    api_client: Any
+    dynamic_client: Any = None
+    refs: int = 0
+    last_used: float = 0.0
+
+
+# Clé: SHA-256 du contenu du kubeconfig (deux chemins vers le même
+# kubeconfig partagent le même client)
+_CLIENT_POOL: Dict[str, _PooledClient] = {}
+_POOL_LOCK = threading.Lock()
+
+
+def _kubeconfig_key(kubeconfig_path: str) -> str:
+    """Calcule la clé du pool pour un kubeconfig"""
+    with open(kubeconfig_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _evict_idle_clients(incoming: bool = False) -> None:
+    """
+    Ferme les clients inutilisés (appelé avec le verrou détenu)
+    
+    Un client encore référencé n'est jamais fermé. Au-delà de
+    CLIENT_POOL_MAX_SIZE, les clients libres les plus anciens sont fermés
+    même s'ils n'ont pas atteint CLIENT_IDLE_TIMEOUT.
+    
+    Args:
+        incoming: Un nouveau client va être ajouté (compte dans la taille)
+    """
+    now = time.monotonic()
+    idle = sorted(
+        (entry.last_used, key) for key, entry in _CLIENT_POOL.items() if entry.refs == 0
+    )
+    overflow = len(_CLIENT_POOL) + incoming - CLIENT_POOL_MAX_SIZE
+    
+    for last_used, key in idle:
+        if overflow <= 0 and now - last_used < CLIENT_IDLE_TIMEOUT:
+            break
+        _CLIENT_POOL.pop(key).api_client.close()
+        overflow -= 1
+
+
+def _configure_connection_pool(configuration: Any) -> None:
+    """
+    Règle le pool urllib3 d'un client pour réutiliser ses connexions
+    
+    urllib3 garde les connexions ouvertes (keep-alive) tant que le pool a de
+    la place: avec une taille suffisante, les appels REST et les watches d'un
+    workflow partagent les mêmes connexions TLS au lieu d'en rouvrir.
+    
+    Args:
+        configuration: kubernetes.client.Configuration à modifier
+    """
+    from urllib3.util.retry import Retry
+    
+    configuration.connection_pool_maxsize = max(
+        configuration.connection_pool_maxsize or 0, CLIENT_CONNECTION_POOL_MAXSIZE
+    )
+    configuration.retries = Retry(total=CLIENT_RETRIES, backoff_factor=CLIENT_RETRY_BACKOFF)
+
+
+def get_api_client(kubeconfig_path: str) -> Any:
+    """
+    Retourne un ApiClient partagé pour ce kubeconfig
+    
+    Le client (et son pool de connexions HTTP) est réutilisé par tous les
+    appelants qui utilisent le même kubeconfig. Chaque appel doit être suivi
+    d'un release_api_client() quand le client n'est plus utilisé.
+    
+    Args:
+        kubeconfig_path: Chemin du kubeconfig
+    
+    Returns:
+        ApiClient: Client Kubernetes
+    """
+    try:
+        from kubernetes import client, config as k8s_config
+    except ImportError:
+        raise ImportError("kubernetes not installed. Run: pip install kubernetes")
+    
+    key = _kubeconfig_key(kubeconfig_path)
+    
+    with _POOL_LOCK:
+        _evict_idle_clients()
+        
+        entry = _CLIENT_POOL.get(key)
+        if entry is not None:
+            entry.refs += 1
+            entry.last_used = time.monotonic()
+            return entry.api_client
+    
+    # Chargement du kubeconfig hors verrou (lecture disque, éventuel
+    # plugin d'authentification): les autres clusters ne sont pas bloqués
+    configuration = client.Configuration()
+    k8s_config.load_kube_config(
+        config_file=kubeconfig_path, client_configuration=configuration
+    )
+    _configure_connection_pool(configuration)
+    api_client = client.ApiClient(configuration)
+    
+    with _POOL_LOCK:
+        entry = _CLIENT_POOL.get(key)
+        if entry is None:
+            _evict_idle_clients(incoming=True)
+            entry = _PooledClient(api_client=api_client)
+            _CLIENT_POOL[key] = entry
+        else:
+            # Un autre thread a créé le client entre-temps: le sien est gardé
+            api_client.close()
+        
+        entry.refs += 1
+        entry.last_used = time.monotonic()
+        return entry.api_client
+
+
+def release_api_client(api_client: Any) -> None:
+    """
+    Rend un client obtenu via get_api_client() au pool
+    
+    Args:
+        api_client: Client à libérer
+    """
+    with _POOL_LOCK:
+        for entry in _CLIENT_POOL.values():
+            if entry.api_client is api_client:
+                entry.refs = max(0, entry.refs - 1)
+                entry.last_used = time.monotonic()
+                break
+
+
+def get_dynamic_client(api_client: Any) -> Any:
+    """
+    Retourne le DynamicClient partagé d'un client du pool
+    
+    Le discovery des API du cluster (fait à la création du DynamicClient)
+    n'a lieu qu'une fois par cluster pour tous les agents; une ressource
+    absente du cache (CRD installée depuis) relance le discovery.
+    
+    Args:
+        api_client: Client obtenu via get_api_client()
+    
+    Returns:
+        DynamicClient: Client dynamique réutilisé
+    """
+    from kubernetes.dynamic import DynamicClient
+    
+    with _POOL_LOCK:
+        entry = next(
+            (entry for entry in _CLIENT_POOL.values() if entry.api_client is api_client), None
+        )
+        if entry is not None and entry.dynamic_client is not None:
+            return entry.dynamic_client
+    
+    # Discovery hors verrou (requêtes réseau)
+    dynamic_client = DynamicClient(api_client)
+    
+    with _POOL_LOCK:
+        if entry is None:
+            return dynamic_client
+        if entry.dynamic_client is None:
+            entry.dynamic_client = dynamic_client
+        return entry.dynamic_client
+
+
+def server_side_apply(
+    resource: Any,
+    manifest: Dict[str, Any],
+    namespace: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Applique un objet en server-side apply
+    
+    Utilise force_conflicts pour reprendre les champs gérés par un autre
+    field manager (anciennes installations, kubectl apply client-side).
+    
+    Args:
+        resource: Ressource résolue par le DynamicClient
+        manifest: Objet à appliquer
+        namespace: Namespace (par défaut celui du manifest; None pour les
+            objets cluster-scoped)
+    
+    Returns:
+        Optional[str]: Message d'erreur, None si succès
+    """
+    metadata = manifest["metadata"]
+    try:
+        resource.server_side_apply(
+            body=manifest,
+            name=metadata["name"],
+            namespace=namespace or metadata.get("namespace"),
+            field_manager=FIELD_MANAGER,
+            force_conflicts=True,
+        )
+        return None
+    except Exception as e:
+        return f"{manifest['kind']}/{metadata['name']}: {e}"
@@ -3,10 +3,13 @@ LLM Provider Module
 Interface unifiée pour différents providers LLM
 """
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 from core.config import Config, LLMProvider
 
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseLLM
+
 
 class LLMProviderInterface(ABC):
     """Interface abstraite pour les providers LLM"""
@@ -110,7 +113,7 @@ class LLMProviderFactory:
         return provider_class(config)
     
     @staticmethod
-    def get_llm(config: Optional[Config] = None) -> BaseLLM:
+    def get_llm(config: Optional[Config] = None) -> "BaseLLM":
         """Méthode de convenance pour obtenir directement une instance LLM"""
         from core.config import config as default_config
         cfg = config or default_config
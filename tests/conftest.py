@@ -0,0 +1,14 @@
+"""
+Fixtures partagées des tests
+"""
+import pytest
+
+
+@pytest.fixture
+def kubeconfig(tmp_path):
+    """Crée un kubeconfig (son contenu seul identifie le cluster)"""
+    def _make(name, content):
+        path = tmp_path / name
+        path.write_text(content)
+        return str(path)
+    return _make
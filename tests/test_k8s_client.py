@@ -0,0 +1,207 @@
+"""
+Tests du pool de clients Kubernetes partagé (core.k8s_client)
+"""
+import sys
+import types
+
+import pytest
+
+from core import k8s_client
+
+
+class FakeApiClient:
+    """ApiClient factice: enregistre sa fermeture"""
+    
+    def __init__(self, configuration):
+        self.configuration = configuration
+        self.closed = False
+    
+    def close(self):
+        self.closed = True
+
+
+class FakeDynamicClient:
+    """DynamicClient factice: compte les discovery"""
+    
+    created = 0
+    
+    def __init__(self, api_client):
+        FakeDynamicClient.created += 1
+        self.api_client = api_client
+
+
+@pytest.fixture
+def fake_kubernetes(monkeypatch):
+    """Remplace le package kubernetes par des modules factices"""
+    client = types.SimpleNamespace(
+        Configuration=lambda: types.SimpleNamespace(connection_pool_maxsize=None, retries=None),
+        ApiClient=FakeApiClient,
+    )
+    config = types.SimpleNamespace(load_kube_config=lambda **kwargs: None)
+    kubernetes = types.ModuleType("kubernetes")
+    kubernetes.client = client
+    kubernetes.config = config
+    dynamic = types.ModuleType("kubernetes.dynamic")
+    dynamic.DynamicClient = FakeDynamicClient
+    
+    monkeypatch.setitem(sys.modules, "kubernetes", kubernetes)
+    monkeypatch.setitem(sys.modules, "kubernetes.dynamic", dynamic)
+    monkeypatch.setattr(k8s_client, "_CLIENT_POOL", {})
+    FakeDynamicClient.created = 0
+    return kubernetes
+
+
+class TestClientPool:
+    """Tests de get_api_client / release_api_client"""
+    
+    def test_same_kubeconfig_content_shares_client(self, fake_kubernetes, kubeconfig):
+        first = k8s_client.get_api_client(kubeconfig("a", "cluster-1"))
+        second = k8s_client.get_api_client(kubeconfig("b", "cluster-1"))
+        
+        assert first is second
+        assert len(k8s_client._CLIENT_POOL) == 1
+        assert next(iter(k8s_client._CLIENT_POOL.values())).refs == 2
+    
+    def test_different_kubeconfigs_get_different_clients(self, fake_kubernetes, kubeconfig):
+        first = k8s_client.get_api_client(kubeconfig("a", "cluster-1"))
+        second = k8s_client.get_api_client(kubeconfig("b", "cluster-2"))
+        
+        assert first is not second
+        assert len(k8s_client._CLIENT_POOL) == 2
+    
+    def test_client_built_during_race_is_discarded(self, fake_kubernetes, kubeconfig, monkeypatch):
+        path = kubeconfig("a", "cluster-1")
+        built = []
+        
+        def load_kube_config(**kwargs):
+            # Un autre appelant crée le client pendant le chargement (hors verrou)
+            if not built:
+                built.append(None)
+                built.append(k8s_client.get_api_client(path))
+        
+        monkeypatch.setattr(fake_kubernetes.config, "load_kube_config", load_kube_config)
+        api_client = k8s_client.get_api_client(path)
+        
+        assert api_client is built[1]
+        assert len(k8s_client._CLIENT_POOL) == 1
+        assert next(iter(k8s_client._CLIENT_POOL.values())).refs == 2
+    
+    def test_connection_pool_is_configured(self, fake_kubernetes, kubeconfig):
+        api_client = k8s_client.get_api_client(kubeconfig("a", "cluster-1"))
+        
+        configuration = api_client.configuration
+        assert configuration.connection_pool_maxsize == k8s_client.CLIENT_CONNECTION_POOL_MAXSIZE
+        assert configuration.retries.total == k8s_client.CLIENT_RETRIES
+    
+    def test_release_decrements_refs(self, fake_kubernetes, kubeconfig):
+        path = kubeconfig("a", "cluster-1")
+        api_client = k8s_client.get_api_client(path)
+        k8s_client.get_api_client(path)
+        
+        k8s_client.release_api_client(api_client)
+        k8s_client.release_api_client(api_client)
+        k8s_client.release_api_client(api_client)
+        
+        entry = next(iter(k8s_client._CLIENT_POOL.values()))
+        assert entry.refs == 0
+        assert not api_client.closed
+    
+    def test_idle_client_is_evicted(self, fake_kubernetes, kubeconfig, monkeypatch):
+        idle = k8s_client.get_api_client(kubeconfig("a", "cluster-1"))
+        k8s_client.release_api_client(idle)
+        
+        now = k8s_client.time.monotonic() + k8s_client.CLIENT_IDLE_TIMEOUT + 1
+        monkeypatch.setattr(k8s_client.time, "monotonic", lambda: now)
+        k8s_client.get_api_client(kubeconfig("b", "cluster-2"))
+        
+        assert idle.closed
+        assert len(k8s_client._CLIENT_POOL) == 1
+    
+    def test_referenced_client_is_never_evicted(self, fake_kubernetes, kubeconfig, monkeypatch):
+        in_use = k8s_client.get_api_client(kubeconfig("a", "cluster-1"))
+        
+        now = k8s_client.time.monotonic() + k8s_client.CLIENT_IDLE_TIMEOUT + 1
+        monkeypatch.setattr(k8s_client.time, "monotonic", lambda: now)
+        k8s_client.get_api_client(kubeconfig("b", "cluster-2"))
+        
+        assert not in_use.closed
+        assert len(k8s_client._CLIENT_POOL) == 2
+    
+    def test_oldest_free_client_is_evicted_over_max_size(self, fake_kubernetes, kubeconfig, monkeypatch):
+        monkeypatch.setattr(k8s_client, "CLIENT_POOL_MAX_SIZE", 1)
+        oldest = k8s_client.get_api_client(kubeconfig("a", "cluster-1"))
+        k8s_client.release_api_client(oldest)
+        
+        k8s_client.get_api_client(kubeconfig("b", "cluster-2"))
+        
+        assert oldest.closed
+        assert len(k8s_client._CLIENT_POOL) == 1
+
+
+class TestDynamicClient:
+    """Tests de get_dynamic_client"""
+    
+    def test_dynamic_client_is_shared_per_pooled_client(self, fake_kubernetes, kubeconfig):
+        api_client = k8s_client.get_api_client(kubeconfig("a", "cluster-1"))
+        
+        first = k8s_client.get_dynamic_client(api_client)
+        second = k8s_client.get_dynamic_client(api_client)
+        
+        assert first is second
+        assert FakeDynamicClient.created == 1
+    
+    def test_client_outside_pool_is_not_cached(self, fake_kubernetes):
+        api_client = FakeApiClient(configuration=None)
+        
+        first = k8s_client.get_dynamic_client(api_client)
+        second = k8s_client.get_dynamic_client(api_client)
+        
+        assert first is not second
+        assert FakeDynamicClient.created == 2
+
+
+class FakeResource:
+    """Ressource factice: enregistre les applies, échoue sur demande"""
+    
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+    
+    def server_side_apply(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.error:
+            raise self.error
+
+
+class TestServerSideApply:
+    """Tests de server_side_apply"""
+    
+    MANIFEST = {
+        "kind": "Deployment",
+        "metadata": {"name": "grafana", "namespace": "monitoring"},
+    }
+    
+    def test_success_returns_none(self):
+        resource = FakeResource()
+        
+        assert k8s_client.server_side_apply(resource, self.MANIFEST) is None
+        
+        call = resource.calls[0]
+        assert call["name"] == "grafana"
+        assert call["namespace"] == "monitoring"
+        assert call["field_manager"] == k8s_client.FIELD_MANAGER
+        assert call["force_conflicts"] is True
+    
+    def test_namespace_argument_overrides_manifest(self):
+        resource = FakeResource()
+        
+        k8s_client.server_side_apply(resource, self.MANIFEST, namespace="other")
+        
+        assert resource.calls[0]["namespace"] == "other"
+    
+    def test_error_is_returned_with_object_name(self):
+        resource = FakeResource(error=RuntimeError("conflict"))
+        
+        error = k8s_client.server_side_apply(resource, self.MANIFEST)
+        
+        assert error == "Deployment/grafana: conflict"
@@ -0,0 +1,155 @@
+"""
+Tests du déploiement direct du MonitoringAgent (skip par empreintes)
+"""
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from agents import monitoring_agent
+from agents.monitoring_agent import DEPLOYED_HASH_FILE, DEPLOYED_HASH_MAX_AGE, MonitoringAgent
+from core.config import Config, DeploymentMode
+
+
+class FakeResource:
+    """Ressource factice d'un kind: applies enregistrés, objets présents simulés"""
+    
+    def __init__(self, cluster, kind):
+        self.cluster = cluster
+        self.kind = kind
+    
+    def server_side_apply(self, body, name, namespace, field_manager, force_conflicts):
+        if (self.kind, name) in self.cluster.failing:
+            raise RuntimeError("apply refused")
+        self.cluster.applied.append((self.kind, name))
+        self.cluster.objects.add((self.kind, name))
+    
+    def get(self, name, namespace=None):
+        if (self.kind, name) not in self.cluster.objects:
+            raise RuntimeError("not found")
+
+
+class FakeCluster:
+    """Cluster factice exposé via un DynamicClient"""
+    
+    def __init__(self):
+        self.applied = []
+        self.objects = set()
+        self.failing = set()
+        self.resources = self
+    
+    def get(self, api_version, kind):
+        return FakeResource(self, kind)
+
+
+@pytest.fixture
+def cluster(monkeypatch):
+    """Branche le MonitoringAgent sur un cluster factice"""
+    fake = FakeCluster()
+    monkeypatch.setattr("core.agent_base.get_api_client", lambda path: object())
+    monkeypatch.setattr("core.agent_base.release_api_client", lambda client: None)
+    monkeypatch.setattr(monitoring_agent, "get_dynamic_client", lambda client: fake)
+    return fake
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    """MonitoringAgent en mode réel, sans LLM"""
+    monkeypatch.setattr("core.agent_base.LLMProviderFactory.get_llm", lambda config: object())
+    config = Config(
+        deployment_mode=DeploymentMode.REAL,
+        output_dir=tmp_path / "output",
+        data_dir=tmp_path / "data",
+    )
+    return MonitoringAgent(config, MagicMock())
+
+
+@pytest.fixture
+def manifests_dir(tmp_path):
+    path = tmp_path / "manifests"
+    path.mkdir()
+    return path
+
+
+def deploy(agent, kubeconfig_path, manifests_dir, cluster):
+    """Lance un déploiement et retourne (succès, objets appliqués)"""
+    cluster.applied.clear()
+    success = agent._deploy_monitoring_stack(kubeconfig_path, manifests_dir, {})
+    return success, list(cluster.applied)
+
+
+class TestDeployedHashSkip:
+    """Tests du skip des objets déjà appliqués"""
+    
+    def test_first_deploy_applies_every_object(self, agent, cluster, kubeconfig, manifests_dir):
+        success, applied = deploy(agent, kubeconfig("kc", "cluster-1"), manifests_dir, cluster)
+        
+        assert success
+        assert len(applied) == len(list(MonitoringAgent._manifest_objects({})))
+        assert applied[0] == ("Namespace", "monitoring")
+    
+    def test_unchanged_objects_are_skipped(self, agent, cluster, kubeconfig, manifests_dir):
+        path = kubeconfig("kc", "cluster-1")
+        deploy(agent, path, manifests_dir, cluster)
+        
+        success, applied = deploy(agent, path, manifests_dir, cluster)
+        
+        assert success
+        assert applied == []
+    
+    def test_deleted_object_is_reapplied(self, agent, cluster, kubeconfig, manifests_dir):
+        path = kubeconfig("kc", "cluster-1")
+        deploy(agent, path, manifests_dir, cluster)
+        cluster.objects.discard(("Deployment", "grafana"))
+        
+        success, applied = deploy(agent, path, manifests_dir, cluster)
+        
+        assert success
+        assert applied == [("Deployment", "grafana")]
+    
+    def test_state_is_kept_per_cluster(self, agent, cluster, kubeconfig, manifests_dir):
+        first = kubeconfig("kc1", "cluster-1")
+        second = kubeconfig("kc2", "cluster-2")
+        deploy(agent, first, manifests_dir, cluster)
+        
+        _, applied_second = deploy(agent, second, manifests_dir, cluster)
+        _, applied_first = deploy(agent, first, manifests_dir, cluster)
+        
+        assert applied_second
+        assert applied_first == []
+    
+    def test_force_apply_ignores_state(self, agent, cluster, kubeconfig, manifests_dir):
+        path = kubeconfig("kc", "cluster-1")
+        deploy(agent, path, manifests_dir, cluster)
+        agent.config.force_monitoring_apply = True
+        
+        _, applied = deploy(agent, path, manifests_dir, cluster)
+        
+        assert len(applied) == len(list(MonitoringAgent._manifest_objects({})))
+    
+    def test_expired_entries_are_reapplied(self, agent, cluster, kubeconfig, manifests_dir):
+        path = kubeconfig("kc", "cluster-1")
+        deploy(agent, path, manifests_dir, cluster)
+        
+        deployed_file = manifests_dir / DEPLOYED_HASH_FILE
+        record = json.loads(deployed_file.read_text())
+        objects = next(iter(record.values()))
+        objects["apps/v1/Deployment/monitoring/grafana"]["applied_at"] -= DEPLOYED_HASH_MAX_AGE + 1
+        deployed_file.write_text(json.dumps(record))
+        
+        _, applied = deploy(agent, path, manifests_dir, cluster)
+        
+        assert applied == [("Deployment", "grafana")]
+    
+    def test_failed_objects_are_retried(self, agent, cluster, kubeconfig, manifests_dir):
+        path = kubeconfig("kc", "cluster-1")
+        cluster.failing.add(("Service", "grafana"))
+        
+        success, _ = deploy(agent, path, manifests_dir, cluster)
+        assert not success
+        
+        cluster.failing.clear()
+        success, applied = deploy(agent, path, manifests_dir, cluster)
+        
+        assert success
+        assert applied == [("Service", "grafana")]